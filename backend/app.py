@@ -1,17 +1,25 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, FileResponse
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 import os
 import sys
+import asyncio
+import logging
 
 # Add the current directory to the Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from services.rag_service import RAGService
 from services.gemini_service import GeminiService
+from services.llm_providers import LLMUnavailableError
 from services.history_service import HistoryService
+from services.admission_service import AdmissionController, AdmissionRejected
+from services.profiling_service import RequestProfiler
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="RAG Anything Assistant API",
@@ -33,6 +41,17 @@ rag_service = RAGService()
 gemini_service = GeminiService()
 history_service = HistoryService()
 
+# Admission control untuk /chat (endpoint ringan seperti /health, /stats,
+# dan /history tidak melewati antrian ini sehingga tetap responsif)
+chat_admission = AdmissionController(
+    max_concurrent=int(os.getenv("CHAT_MAX_CONCURRENT", "8")),
+    max_queue=int(os.getenv("CHAT_MAX_QUEUE", "32")),
+    max_queue_time=float(os.getenv("CHAT_MAX_QUEUE_TIME", "10"))
+)
+
+# Profiling on-demand (nonaktif secara default)
+request_profiler = RequestProfiler()
+
 # Pydantic models
 class ChatRequest(BaseModel):
     question: str
@@ -52,28 +71,60 @@ async def root():
     }
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request, response: Response):
     """
     Endpoint utama untuk chat dengan RAG system
     """
     try:
-        # Ambil context dari knowledge base
-        context = rag_service.retrieve_context(request.question)
+        async with chat_admission.slot():
+            return await _process_chat(request, http_request, response)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.reason,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+def _retrieve_context(question: str, profile):
+    """
+    Retrieval (dijalankan di thread pool); section profile ikut di thread yang sama
+    """
+    with profile.section("retrieval"):
+        return rag_service.retrieve_context(question)
+
+async def _process_chat(request: ChatRequest, http_request: Request, response: Response) -> ChatResponse:
+    """
+    Proses chat: retrieval, generate jawaban, lalu simpan ke history
+    """
+    profile = request_profiler.start(http_request.headers)
+    error: Optional[HTTPException] = None
+    
+    try:
+        # Ambil context dari knowledge base di thread pool: ingest dan scoring
+        # (termasuk menunggu worker paralel) tidak memblokir event loop
+        loop = asyncio.get_running_loop()
+        context = await loop.run_in_executor(None, _retrieve_context, request.question, profile)
+        
+        with profile.section("prompt"):
+            prompt = gemini_service.build_prompt(request.question, context)
         
         # Generate response menggunakan Gemini
-        answer = await gemini_service.generate_response(
-            question=request.question,
-            context=context
-        )
+        with profile.section("llm", collect=False):
+            answer = await gemini_service.generate_response(
+                question=request.question,
+                context=context,
+                prompt=prompt
+            )
         
         # Simpan ke history
         timestamp = datetime.now().isoformat()
-        history_service.save_chat(
-            question=request.question,
-            answer=answer,
-            timestamp=timestamp,
-            sources=context.get("sources", [])
-        )
+        with profile.section("history"):
+            history_service.save_chat(
+                question=request.question,
+                answer=answer,
+                timestamp=timestamp,
+                sources=context.get("sources", [])
+            )
         
         return ChatResponse(
             answer=answer,
@@ -81,16 +132,35 @@ async def chat(request: ChatRequest):
             sources=context.get("sources", [])
         )
         
+    except LLMUnavailableError as e:
+        # Semua provider LLM gagal: jawaban tidak disimpan ke history
+        error = HTTPException(
+            status_code=503,
+            detail=f"LLM tidak tersedia: {str(e)}",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing chat: {str(e)}")
+        error = HTTPException(status_code=500, detail=f"Error processing chat: {str(e)}")
+    
+    finally:
+        profile_id = profile.finish()
+        if profile_id:
+            response.headers["X-Profile-Id"] = profile_id
+            # Header pada response yang di-inject hilang jika HTTPException
+            # di-raise, jadi ikut disertakan di header error
+            if error is not None:
+                error.headers = {**(error.headers or {}), "X-Profile-Id": profile_id}
+    
+    raise error
 
 @app.get("/history/{tanggal}")
-async def get_history(tanggal: str):
+async def get_history(tanggal: str, offset: int = Query(0, ge=0), limit: Optional[int] = Query(None, ge=1)):
     """
-    Ambil history chat berdasarkan tanggal (format: YYYY-MM-DD)
+    Ambil history chat berdasarkan tanggal (format: YYYY-MM-DD),
+    opsional per halaman dengan offset/limit
     """
     try:
-        history = history_service.get_history_by_date(tanggal)
+        history = history_service.get_history_by_date(tanggal, offset=offset, limit=limit)
         return {
             "date": tanggal,
             "conversations": history
@@ -108,12 +178,43 @@ async def get_stats():
             "total_articles": rag_service.count_articles(),
             "total_projects": rag_service.count_projects(),
             "total_conversations": history_service.count_total_conversations(),
+            "admission": chat_admission.get_stats(),
+            "llm": gemini_service.get_stats(),
+            "history_storage": history_service.get_storage_stats(),
             "last_updated": datetime.now().isoformat()
         }
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving stats: {str(e)}")
 
+def _require_profiler(http_request: Request):
+    """
+    Endpoint profiling hanya ada jika PROFILE_ENABLED=true dan token cocok
+    """
+    if not request_profiler.enabled:
+        raise HTTPException(status_code=404, detail="Profiling tidak aktif")
+    if not request_profiler.is_authorized(http_request.headers.get("x-profile-token")):
+        raise HTTPException(status_code=403, detail="Token profiling tidak valid")
+
+@app.get("/admin/profiles")
+async def list_profiles(http_request: Request):
+    """
+    Daftar profile request yang tersimpan
+    """
+    _require_profiler(http_request)
+    return {"profiles": request_profiler.list_profiles()}
+
+@app.get("/admin/profiles/{name}")
+async def download_profile(name: str, http_request: Request):
+    """
+    Download file profile (.prof, bisa dibuka dengan pstats/snakeviz)
+    """
+    _require_profiler(http_request)
+    path = request_profiler.get_profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile tidak ditemukan")
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -127,6 +228,30 @@ async def health_check():
         }
     }
 
+async def _history_compaction_loop():
+    """
+    Jalankan compaction history saat startup lalu setiap HISTORY_COMPACTION_INTERVAL detik
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await loop.run_in_executor(None, history_service.compact)
+        except Exception as e:
+            logger.error(f"History compaction failed: {str(e)}")
+        await asyncio.sleep(history_service.compaction_interval)
+
+@app.on_event("startup")
+async def startup():
+    """Mulai job compaction history di background"""
+    app.state.history_compaction = asyncio.create_task(_history_compaction_loop())
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Tutup worker scoring, job compaction, dan session HTTP saat aplikasi berhenti"""
+    app.state.history_compaction.cancel()
+    rag_service.close()
+    await gemini_service.close()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1 @@
+# Benchmark offline untuk RAG service (jalankan dari folder backend)
@@ -0,0 +1,350 @@
+"""
+Benchmark offline kualitas dan latency retrieval RAGService
+
+Mengukur recall@k, MRR, latency p50/p99, waktu build index, ukuran index
+yang benar-benar dibangun mode tersebut (memori dan file segment di disk),
+serta peak RSS proses utama dan worker untuk setiap mode retrieval. Setiap
+kombinasi (corpus, mode) dijalankan di process terpisah supaya peak RSS
+tidak saling tercampur. Hasil ditulis sebagai JSON untuk dibandingkan antar commit.
+
+Contoh:
+    python -m benchmarks.run --sizes 1000 10000 100000 --output bench.json
+    python -m benchmarks.run --history ../rag-data/data-history --modes exact fuzzy
+"""
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import platform
+import subprocess
+import tempfile
+import tracemalloc
+import multiprocessing
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import generate_corpus, generate_questions
+
+try:
+    import resource
+except ImportError:
+    # Windows: peak memory diambil lewat psutil jika terpasang
+    resource = None
+
+# Mode retrieval = environment variable yang dibaca RAGService saat init
+MODES: Dict[str, Dict[str, str]] = {
+    "exact": {
+        "RAG_FUZZY_MATCHING": "false", "RAG_INDONESIAN_STEMMER": "false",
+        "RAG_DEDUP": "false", "RAG_SCORING_WORKERS": "1",
+    },
+    "fuzzy": {
+        "RAG_FUZZY_MATCHING": "true", "RAG_INDONESIAN_STEMMER": "true",
+        "RAG_DEDUP": "false", "RAG_SCORING_WORKERS": "1",
+    },
+    "default": {
+        "RAG_FUZZY_MATCHING": "true", "RAG_INDONESIAN_STEMMER": "true",
+        "RAG_DEDUP": "true", "RAG_SCORING_WORKERS": "1",
+    },
+    "parallel": {
+        "RAG_FUZZY_MATCHING": "true", "RAG_INDONESIAN_STEMMER": "true",
+        "RAG_DEDUP": "true", "RAG_SCORING_WORKERS": "4", "RAG_PARALLEL_THRESHOLD": "0",
+    },
+}
+
+RECALL_AT = (1, 5, 10)
+
+
+def load_history_questions(history_path: Path) -> List[Dict[str, Any]]:
+    """
+    Pertanyaan berlabel dari history (file harian dan arsip); sources yang
+    tercatat dipakai sebagai label dokumen relevan
+    """
+    from services.history_service import HistoryService
+
+    history_service = HistoryService(base_path=history_path)
+    questions = []
+    for date_str in history_service.list_dates():
+        for conversation in history_service.get_history_by_date(date_str):
+            if conversation.get("question") and conversation.get("sources"):
+                questions.append({
+                    "question": conversation["question"],
+                    "relevant": conversation["sources"],
+                    "variant": "history"
+                })
+    return questions
+
+
+def load_labelled_questions(path: Path) -> List[Dict[str, Any]]:
+    """
+    Pertanyaan berlabel dari file JSON: [{"question": ..., "relevant": [...]}]
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [{"variant": "labelled", **item} for item in data]
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percentile * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _quality(ranked_sources: List[str], relevant: List[str]) -> Dict[str, float]:
+    relevant_set = set(relevant)
+    metrics = {}
+    for k in RECALL_AT:
+        found = relevant_set.intersection(ranked_sources[:k])
+        metrics[f"recall@{k}"] = len(found) / len(relevant_set)
+
+    metrics["mrr"] = 0.0
+    for rank, source in enumerate(ranked_sources, 1):
+        if source in relevant_set:
+            metrics["mrr"] = 1.0 / rank
+            break
+    return metrics
+
+
+def _average(rows: List[Dict[str, float]]) -> Dict[str, float]:
+    if not rows:
+        return {}
+    return {key: round(sum(row[key] for row in rows) / len(rows), 4) for key in rows[0]}
+
+
+def _process_peak_rss() -> Optional[int]:
+    """
+    Peak RSS (byte) process ini sendiri
+
+    Di Linux dibaca dari VmHWM: ru_maxrss process hasil spawn ikut mencatat
+    RSS parent saat fork (sebelum exec), sehingga tidak mencerminkan memori
+    process itu sendiri. Di macOS ru_maxrss (dalam byte), di Windows psutil.
+    """
+    try:
+        with open("/proc/self/status", 'r', encoding='ascii') as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    if resource is not None:
+        unit = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return getattr(info, "peak_wset", info.rss)  # peak_wset hanya ada di Windows
+
+
+def _report_peak_rss(delay: float) -> Tuple[int, Optional[int]]:
+    """
+    Dijalankan di worker scoring: (pid, peak RSS worker tersebut)
+    """
+    # Task yang sedikit lambat membuat setiap worker kebagian task
+    time.sleep(delay)
+    return os.getpid(), _process_peak_rss()
+
+
+def _worker_peak_rss(scoring_executor) -> Optional[int]:
+    """
+    Peak RSS worker scoring terbesar (byte); setiap worker melaporkan peak
+    miliknya sendiri, 0 jika mode ini tidak memakai worker
+    """
+    if scoring_executor is None or scoring_executor._pool is None:
+        return 0
+
+    pool = scoring_executor._get_pool()
+    futures = [pool.submit(_report_peak_rss, 0.05) for _ in range(scoring_executor.workers * 4)]
+    peaks = dict(future.result() for future in futures)
+    if any(peak is None for peak in peaks.values()):
+        return None
+    return max(peaks.values(), default=0)
+
+
+def _to_mb(value: Optional[int]) -> Optional[float]:
+    return round(value / 1024 ** 2, 1) if value is not None else None
+
+
+def _index_memory_bytes(base_path: str) -> int:
+    """
+    Memori yang dialokasikan saat membangun index mode ini (corpus, term set,
+    indeks trigram, hasil dedup), diukur dengan tracemalloc pada instance baru
+    """
+    from services.rag_service import RAGService
+
+    tracemalloc.start()
+    try:
+        rag_service = RAGService(base_path=Path(base_path))
+        baseline = tracemalloc.get_traced_memory()[0]
+        rag_service._ensure_corpus()
+        allocated = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    rag_service.close()
+    return allocated
+
+
+def _run_mode(base_path: str, mode: str, questions: List[Dict[str, Any]], result_queue):
+    """
+    Dijalankan di process anak: build index, jalankan semua pertanyaan
+    """
+    os.environ.update(MODES[mode])
+
+    from services.rag_service import RAGService
+
+    rag_service = RAGService(base_path=Path(base_path))
+
+    started = time.perf_counter()
+    corpus = rag_service._ensure_corpus()
+    build_seconds = time.perf_counter() - started
+
+    # File segment di disk hanya dibuat jika mode ini memakai scoring paralel
+    segment = rag_service._loaded[1]
+    index_disk = os.path.getsize(segment[0]) if segment else 0
+
+    # Pemanasan (spawn worker, cache ekspansi tidak ikut karena pertanyaan berbeda)
+    rag_service.retrieve_context("pemanasan benchmark")
+
+    latencies = []
+    per_variant: Dict[str, List[Dict[str, float]]] = {}
+    all_quality = []
+    for item in questions:
+        started = time.perf_counter()
+        context = rag_service.retrieve_context(item["question"])
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        quality = _quality(context["sources"], item["relevant"])
+        all_quality.append(quality)
+        per_variant.setdefault(item.get("variant", "default"), []).append(quality)
+
+    # Diukur sebelum close() selagi worker scoring masih hidup
+    peak_rss = _process_peak_rss()
+    peak_worker_rss = _worker_peak_rss(rag_service.scoring_executor)
+    rag_service.close()
+
+    index_memory = _index_memory_bytes(base_path)
+    result_queue.put({
+        "mode": mode,
+        "documents": len(corpus),
+        "near_duplicates_merged": sum(len(document["duplicates"]) for document in corpus),
+        "questions": len(questions),
+        "quality": _average(all_quality),
+        "quality_by_variant": {variant: _average(rows) for variant, rows in per_variant.items()},
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 0.50), 3),
+            "p99": round(_percentile(latencies, 0.99), 3),
+            "mean": round(sum(latencies) / len(latencies), 3)
+        } if latencies else {},
+        "index_build_seconds": round(build_seconds, 3),
+        "index_memory_bytes": index_memory,
+        "index_disk_bytes": index_disk,
+        "peak_rss_mb": _to_mb(peak_rss),
+        "peak_worker_rss_mb": _to_mb(peak_worker_rss)
+    })
+
+
+def run_mode(base_path: Path, mode: str, questions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Jalankan satu mode di process terpisah dan ambil hasilnya
+    """
+    context = multiprocessing.get_context("spawn")
+    result_queue = context.Queue()
+    process = context.Process(target=_run_mode, args=(str(base_path), mode, questions, result_queue))
+    process.start()
+
+    # Process anak bisa mati tanpa mengirim hasil (OOM, exception di _run_mode)
+    result = None
+    while result is None:
+        try:
+            result = result_queue.get(timeout=1.0)
+        except queue.Empty:
+            if process.is_alive():
+                continue
+            # Hasil yang dikirim tepat sebelum process selesai masih bisa menyusul
+            try:
+                result = result_queue.get(timeout=1.0)
+            except queue.Empty:
+                break
+
+    process.join()
+    if result is None:
+        error = f"Process benchmark berhenti tanpa hasil (exit code {process.exitcode})"
+        print(f"[benchmark] mode={mode}: {error}", file=sys.stderr)
+        result = {"mode": mode, "error": error}
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark kualitas dan latency retrieval RAGService")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Jumlah dokumen corpus sintetis")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--questions", type=int, default=200,
+                        help="Jumlah pertanyaan per corpus sintetis")
+    parser.add_argument("--history", help="Folder history (data-history) sebagai pertanyaan berlabel")
+    parser.add_argument("--labelled", help="File JSON pertanyaan berlabel")
+    parser.add_argument("--data-path", help="Folder rag-data untuk --history/--labelled")
+    parser.add_argument("--output", help="Simpan hasil JSON ke file (default: stdout)")
+    args = parser.parse_args()
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "runs": []
+    }
+
+    if args.history or args.labelled:
+        # Pertanyaan asli dijalankan terhadap knowledge base sebenarnya
+        questions = []
+        if args.history:
+            questions.extend(load_history_questions(Path(args.history)))
+        if args.labelled:
+            questions.extend(load_labelled_questions(Path(args.labelled)))
+
+        data_path = Path(args.data_path) if args.data_path else Path(__file__).parent.parent.parent / "rag-data"
+        for mode in args.modes:
+            print(f"[real] mode={mode} questions={len(questions)}", file=sys.stderr)
+            report["runs"].append({"corpus": "real", **run_mode(data_path, mode, questions)})
+    else:
+        for size in args.sizes:
+            with tempfile.TemporaryDirectory(prefix="rag-bench-") as temp_dir:
+                started = time.perf_counter()
+                topics = generate_corpus(Path(temp_dir), size)
+                questions = generate_questions(topics, args.questions)
+                print(f"[synthetic-{size}] corpus generated in {time.perf_counter() - started:.1f}s",
+                      file=sys.stderr)
+
+                for mode in args.modes:
+                    print(f"[synthetic-{size}] mode={mode}", file=sys.stderr)
+                    report["runs"].append({"corpus": f"synthetic-{size}", **run_mode(Path(temp_dir), mode, questions)})
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
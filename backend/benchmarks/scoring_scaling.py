@@ -0,0 +1,135 @@
+"""
+Benchmark skalabilitas scoring paralel (ScoringExecutor) untuk 1/2/4/8 worker
+
+Contoh:
+    python -m benchmarks.scoring_scaling --documents 50000 --workers 1 2 4 8
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Ingest dibuat cepat dan scoring paralel dikendalikan manual oleh benchmark
+os.environ.setdefault("RAG_DEDUP", "false")
+os.environ["RAG_SCORING_WORKERS"] = "1"
+
+from benchmarks.synthetic import generate_corpus
+from services.rag_service import RAGService
+from services.scoring_executor import ScoringExecutor
+
+QUERIES = [
+    "Bagaimana implementasi retrieval di backend?",
+    "Apa itu FastAPI dan async endpoint?",
+    "konfigurasi cache untuk query database",
+    "svelte frontend memanggil api backend",
+    "cara deploy server python",
+]
+
+
+def _time_queries(rank, keywords: List, repeats: int) -> Dict[str, Any]:
+    timings = []
+    results = None
+    for _ in range(repeats):
+        for query_keywords in keywords:
+            started = time.perf_counter()
+            results = rank(query_keywords)
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {
+        "mean_ms": round(sum(timings) / len(timings) * 1000, 2),
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 2),
+        "last_result": results
+    }
+
+
+def _top_k(ranked: Dict[Any, List]) -> Dict[Any, List]:
+    """
+    Isi top-k per grup tanpa bergantung urutan item di dalam heap
+    """
+    return {key: sorted(items, reverse=True) for key, items in ranked.items()}
+
+
+def run(documents: int, workers: List[int], repeats: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="rag-bench-") as temp_dir:
+        base_path = Path(temp_dir)
+        generate_corpus(base_path, documents)
+
+        rag_service = RAGService(base_path=base_path)
+        started = time.perf_counter()
+        corpus = rag_service._ensure_corpus()
+        ingest_seconds = time.perf_counter() - started
+
+        keywords = [rag_service._extract_keywords(query) for query in QUERIES]
+        serial = [rag_service._rank_documents(corpus, query_keywords) for query_keywords in keywords]
+
+        rows = []
+        for worker_count in workers:
+            if worker_count <= 1:
+                timing = _time_queries(lambda kw: rag_service._rank_documents(corpus, kw), keywords, repeats)
+                matches = True
+            else:
+                executor = ScoringExecutor(worker_count, base_path / "data-index")
+                executor.load(corpus)
+                try:
+                    # Pemanasan: spawn worker dan mmap file segment
+                    for query_keywords in keywords:
+                        executor.rank(query_keywords)
+                    timing = _time_queries(executor.rank, keywords, repeats)
+                    matches = all(
+                        _top_k(executor.rank(kw)) == _top_k(expected) for kw, expected in zip(keywords, serial)
+                    )
+                finally:
+                    executor.shutdown()
+
+            timing.pop("last_result")
+            rows.append({"workers": worker_count, "matches_serial": matches, **timing})
+
+        baseline = rows[0]["mean_ms"] if rows else 0
+        for row in rows:
+            row["speedup"] = round(baseline / row["mean_ms"], 2) if row["mean_ms"] else 0.0
+
+        return {
+            "documents": len(corpus),
+            "ingest_seconds": round(ingest_seconds, 2),
+            "cpu_count": os.cpu_count(),
+            "results": rows
+        }
+
+
+def render_chart(report: Dict[str, Any]) -> str:
+    """
+    Grafik batang ASCII: latency rata-rata per jumlah worker
+    """
+    rows = report["results"]
+    longest = max((row["mean_ms"] for row in rows), default=1) or 1
+    lines = [f"Scoring {report['documents']} dokumen ({report['cpu_count']} CPU)"]
+    for row in rows:
+        bar = "#" * max(1, int(40 * row["mean_ms"] / longest))
+        lines.append(f"{row['workers']:>2} worker | {bar:<40} {row['mean_ms']:>8.2f} ms  x{row['speedup']}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scoring paralel RAGService")
+    parser.add_argument("--documents", type=int, default=50000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="Simpan hasil dalam format JSON")
+    args = parser.parse_args()
+
+    report = run(args.documents, args.workers, args.repeats)
+    print(render_chart(report))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Generator corpus sintetis (artikel markdown dan repo kode palsu) beserta
+pertanyaan berlabel untuk benchmark retrieval
+"""
+import os
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+WORDS = [
+    "api", "async", "backend", "cache", "context", "data", "database", "deploy",
+    "endpoint", "fastapi", "frontend", "history", "index", "model", "prompt",
+    "python", "query", "rag", "request", "response", "retrieval", "server",
+    "svelte", "token", "vector", "aplikasi", "pengguna", "jawaban", "pertanyaan",
+    "sistem", "dokumen", "pencarian", "konfigurasi", "implementasi", "layanan",
+]
+
+CONSONANTS = "bdfgklmnprstvzj"
+VOWELS = "aeiou"
+
+QUESTION_TEMPLATES = [
+    "Bagaimana cara kerja {topic}?",
+    "Apa itu {topic} dan kapan dipakai?",
+    "Jelaskan konsep {topic} di backend",
+]
+
+
+def _pseudo_word(rng: random.Random, used: set) -> str:
+    """
+    Kata unik yang tidak ada di kosakata umum (topik dokumen)
+    """
+    while True:
+        syllables = rng.randint(3, 4)
+        word = "".join(rng.choice(CONSONANTS) + rng.choice(VOWELS) for _ in range(syllables))
+        if word not in used:
+            used.add(word)
+            return word
+
+
+def _filler(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def _typo(rng: random.Random, word: str) -> str:
+    """
+    Tukar dua huruf bersebelahan (salah ketik yang umum)
+    """
+    position = rng.randint(1, len(word) - 3)
+    return word[:position] + word[position + 1] + word[position] + word[position + 2:]
+
+
+def generate_corpus(path: Path, documents: int, seed: int = 42, code_ratio: float = 0.3,
+                    duplicate_ratio: float = 0.03) -> List[Dict[str, Any]]:
+    """
+    Tulis corpus sintetis ke path (struktur sama dengan rag-data) dan
+    kembalikan daftar topik: {"topic", "relevant": [source, ...]}
+    """
+    rng = random.Random(seed)
+    used: set = set()
+    topics = []
+
+    articles_path = path / "data-artikel"
+    github_path = path / "data-clone-github"
+    os.makedirs(articles_path, exist_ok=True)
+    os.makedirs(github_path, exist_ok=True)
+
+    # Repo palsu: README + 2 file kode, jadi 3 dokumen per repo
+    repo_count = int(documents * code_ratio) // 3
+    article_count = documents - repo_count * 3
+
+    for index in range(article_count):
+        topic = _pseudo_word(rng, used)
+        name = f"artikel_{index:07d}.md"
+        content = (
+            f"# Panduan {topic.capitalize()}\n\n"
+            f"{_filler(rng, 40)} {topic} {_filler(rng, 40)}\n\n"
+            f"## Implementasi {topic}\n\n{_filler(rng, 60)} {topic}.\n"
+        )
+        with open(articles_path / name, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+        relevant = [name]
+        if rng.random() < duplicate_ratio:
+            # Salinan dengan sedikit perubahan (mis. artikel yang di-vendor)
+            copy_name = f"salinan_{index:07d}.md"
+            os.makedirs(articles_path / "vendor", exist_ok=True)
+            with open(articles_path / "vendor" / copy_name, 'w', encoding='utf-8') as f:
+                f.write(content.replace("Panduan", "Catatan", 1))
+            relevant.append(copy_name)
+
+        topics.append({"topic": topic, "relevant": relevant})
+
+    for index in range(repo_count):
+        repo_topic = _pseudo_word(rng, used)
+        repo_name = f"repo_{index:06d}"
+        repo_path = github_path / repo_name
+        os.makedirs(repo_path / "src", exist_ok=True)
+
+        with open(repo_path / "README.md", 'w', encoding='utf-8') as f:
+            f.write(
+                f"# {repo_name}\n\nProject {repo_topic} untuk {_filler(rng, 30)}.\n\n"
+                f"## Instalasi\n\n{_filler(rng, 40)} {repo_topic}\n"
+            )
+        topics.append({"topic": repo_topic, "relevant": [f"GitHub: {repo_name}"]})
+
+        for _ in range(2):
+            code_topic = _pseudo_word(rng, used)
+            file_name = f"{code_topic}_service.py"
+            class_name = code_topic.capitalize() + "Handler"
+            with open(repo_path / "src" / file_name, 'w', encoding='utf-8') as f:
+                f.write(
+                    f'"""{_filler(rng, 20)}"""\n\n\n'
+                    f"class {class_name}:\n"
+                    f"    def handle_{code_topic}(self, request):\n"
+                    f"        # {_filler(rng, 15)}\n"
+                    f"        return request\n"
+                )
+            topics.append({"topic": code_topic, "relevant": [f"Code: {file_name}"]})
+
+    return topics
+
+
+def generate_questions(topics: List[Dict[str, Any]], count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """
+    Buat pertanyaan berlabel dari topik: bentuk asli, salah ketik, dan
+    berimbuhan (-nya) bergantian
+    """
+    rng = random.Random(seed)
+    variants = ["plain", "typo", "affix"]
+    questions = []
+
+    for index, item in enumerate(rng.sample(topics, min(count, len(topics)))):
+        variant = variants[index % len(variants)]
+        topic = item["topic"]
+        if variant == "typo":
+            topic = _typo(rng, topic)
+        elif variant == "affix":
+            topic = topic + "nya"
+
+        questions.append({
+            "question": rng.choice(QUESTION_TEMPLATES).format(topic=topic),
+            "relevant": item["relevant"],
+            "variant": variant
+        })
+
+    return questions
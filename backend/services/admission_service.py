@@ -0,0 +1,139 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """
+    Request ditolak karena server sedang penuh
+    """
+
+    def __init__(self, status_code: int, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class AdmissionController:
+    """
+    Batasi jumlah request yang diproses bersamaan dengan antrian terbatas
+
+    Request di atas batas concurrency menunggu di antrian (FIFO). Jika
+    antrian penuh request langsung ditolak dengan 429, dan jika terlalu
+    lama menunggu ditolak dengan 503; keduanya membawa nilai Retry-After.
+    """
+
+    def __init__(self, max_concurrent: int = 8, max_queue: int = 32, max_queue_time: float = 10.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_queue_time = max_queue_time
+
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        # Statistik untuk endpoint /stats
+        self._admitted = 0
+        self._rejected_queue_full = 0
+        self._rejected_timeout = 0
+        self._max_queue_depth = 0
+        self._avg_service_time = 0.0
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Context manager: tunggu slot, jalankan request, lalu lepaskan slot
+        """
+        await self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._record_service_time(time.monotonic() - started)
+            self.release()
+
+    async def acquire(self):
+        """
+        Ambil slot eksekusi atau raise AdmissionRejected
+        """
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            self._admitted += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self._rejected_queue_full += 1
+            raise AdmissionRejected(429, self._retry_after(), "Antrian request penuh")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._max_queue_depth = max(self._max_queue_depth, len(self._waiters))
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.max_queue_time)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Slot sudah diserahkan tepat sebelum timeout/cancel
+                if isinstance(e, asyncio.CancelledError):
+                    self.release()
+                    raise
+                self._admitted += 1
+                return
+            waiter.cancel()
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._rejected_timeout += 1
+            raise AdmissionRejected(503, self._retry_after(), "Server sedang sibuk, waktu antrian habis")
+
+        self._admitted += 1
+
+    def release(self):
+        """
+        Lepaskan slot; slot langsung diserahkan ke request terdepan di antrian
+        """
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self._active = max(0, self._active - 1)
+
+    def _record_service_time(self, duration: float):
+        if self._avg_service_time == 0.0:
+            self._avg_service_time = duration
+        else:
+            self._avg_service_time = 0.9 * self._avg_service_time + 0.1 * duration
+
+    def _retry_after(self) -> int:
+        """
+        Estimasi detik sampai antrian cukup longgar untuk dicoba lagi
+        """
+        service_time = self._avg_service_time or 1.0
+        backlog = (len(self._waiters) + 1) / max(1, self.max_concurrent)
+        return max(1, math.ceil(service_time * backlog))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Ambil statistik admission control
+        """
+        return {
+            "active_requests": self._active,
+            "queue_depth": len(self._waiters),
+            "max_queue_depth": self._max_queue_depth,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self._admitted,
+            "rejected_queue_full": self._rejected_queue_full,
+            "rejected_timeout": self._rejected_timeout,
+            "avg_service_time": round(self._avg_service_time, 3)
+        }
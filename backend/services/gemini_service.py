@@ -1,11 +1,17 @@
 import os
-import json
-import asyncio
-import aiohttp
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 import logging
 
+from .llm_providers import (
+    CircuitBreaker,
+    GeminiProvider,
+    LLMProvider,
+    LLMUnavailableError,
+    ProviderRouter,
+    StubProvider,
+)
+
 # Load environment variables
 load_dotenv()
 
@@ -16,39 +22,80 @@ class GeminiService:
     Service untuk integrasi dengan Gemini Pro API
     """
     
-    def __init__(self):
+    def __init__(self, providers: Optional[List[LLMProvider]] = None):
         self.api_key = os.getenv("GEMINI_API_KEY")
         if not self.api_key:
             logger.warning("GEMINI_API_KEY not found in environment variables")
         
-        self.base_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent"
-        self.session = None
+        # Daftar model berurutan: model pertama utama, sisanya untuk hedging/fallback.
+        # Entry "stub" atau "stub:<latency>:<error_rate>" memakai provider lokal tanpa jaringan.
+        if providers is None:
+            providers = self._providers_from_env(os.getenv("LLM_MODELS", "gemini-1.5-flash"))
+        
+        breaker_error_rate = float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5"))
+        breaker_max_latency = float(os.getenv("LLM_BREAKER_MAX_LATENCY", "0"))
+        breaker_cooldown = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+        
+        self.router = ProviderRouter(
+            providers,
+            hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95")),
+            hedge_min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY", "1.0")),
+            request_timeout=float(os.getenv("LLM_REQUEST_TIMEOUT", "30")),
+            breaker_factory=lambda: CircuitBreaker(
+                error_rate=breaker_error_rate,
+                max_latency=breaker_max_latency,
+                cooldown=breaker_cooldown
+            )
+        )
+    
+    def _providers_from_env(self, models: str) -> List[LLMProvider]:
+        """
+        Buat provider dari daftar model dipisah koma (LLM_MODELS)
+        """
+        providers: List[LLMProvider] = []
+        for entry in [model.strip() for model in models.split(",") if model.strip()]:
+            if entry.startswith("stub"):
+                parts = entry.split(":")
+                providers.append(StubProvider(
+                    name=entry,
+                    latency=float(parts[1]) if len(parts) > 1 else 0.0,
+                    error_rate=float(parts[2]) if len(parts) > 2 else 0.0
+                ))
+            elif self.api_key:
+                providers.append(GeminiProvider(entry, self.api_key))
+        return providers
     
-    async def _get_session(self):
-        """Get or create aiohttp session"""
-        if self.session is None:
-            self.session = aiohttp.ClientSession()
-        return self.session
+    def build_prompt(self, question: str, context: Dict[str, Any]) -> str:
+        """
+        Format context dari RAG lalu gabungkan dengan pertanyaan menjadi prompt
+        """
+        # Format context untuk prompt
+        formatted_context = self._format_context(context)
+        
+        # Buat prompt yang menggabungkan question dan context
+        return self._create_prompt(question, formatted_context)
     
-    async def generate_response(self, question: str, context: Dict[str, Any]) -> str:
+    async def generate_response(self, question: str, context: Dict[str, Any], prompt: Optional[str] = None) -> str:
         """
         Generate response menggunakan Gemini Pro API dengan context dari RAG
+        (prompt bisa diberikan langsung jika sudah dibangun dengan build_prompt).
+        Raise LLMUnavailableError jika semua provider gagal.
         """
-        if not self.api_key:
+        if not self.router.providers:
             return "Error: Gemini API key tidak ditemukan. Silakan tambahkan GEMINI_API_KEY ke file .env"
         
         try:
-            # Format context untuk prompt
-            formatted_context = self._format_context(context)
-            
-            # Buat prompt yang menggabungkan question dan context
-            prompt = self._create_prompt(question, formatted_context)
+            if prompt is None:
+                prompt = self.build_prompt(question, context)
             
             # Kirim request ke Gemini API
             response = await self._call_gemini_api(prompt)
             
             return response
             
+        except LLMUnavailableError:
+            # Jangan jadikan error sebagai jawaban; app mengembalikan 503
+            raise
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
             return f"Maaf, terjadi error saat memproses pertanyaan Anda: {str(e)}"
@@ -102,82 +149,16 @@ Jawaban:"""
     
     async def _call_gemini_api(self, prompt: str) -> str:
         """
-        Panggil Gemini Pro API
+        Kirim prompt lewat router provider (hedging, fallback, circuit breaker)
         """
-        url = f"{self.base_url}?key={self.api_key}"
-        
-        payload = {
-            "contents": [
-                {
-                    "parts": [
-                        {
-                            "text": prompt
-                        }
-                    ]
-                }
-            ],
-            "generationConfig": {
-                "temperature": 0.7,
-                "topK": 40,
-                "topP": 0.95,
-                "maxOutputTokens": 2048,
-            },
-            "safetySettings": [
-                {
-                    "category": "HARM_CATEGORY_HARASSMENT",
-                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                },
-                {
-                    "category": "HARM_CATEGORY_HATE_SPEECH",
-                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                },
-                {
-                    "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                },
-                {
-                    "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                }
-            ]
-        }
-        
-        headers = {
-            "Content-Type": "application/json"
-        }
-        
-        session = await self._get_session()
-        
-        async with session.post(url, json=payload, headers=headers) as response:
-            if response.status == 200:
-                result = await response.json()
-                
-                # Extract response text
-                if "candidates" in result and len(result["candidates"]) > 0:
-                    candidate = result["candidates"][0]
-                    if "content" in candidate and "parts" in candidate["content"]:
-                        return candidate["content"]["parts"][0]["text"]
-                
-                return "Maaf, tidak ada response yang valid dari Gemini API"
-                
-            else:
-                error_text = await response.text()
-                logger.error(f"Gemini API error: {response.status} - {error_text}")
-                return f"Error dari Gemini API: {response.status}"
+        return await self.router.generate(prompt)
     
-    async def close(self):
-        """Close the aiohttp session"""
-        if self.session:
-            await self.session.close()
-            self.session = None
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Statistik provider LLM: state circuit breaker, error rate, latency
+        """
+        return self.router.get_stats()
     
-    def __del__(self):
-        """Cleanup when object is destroyed"""
-        if self.session and not self.session.closed:
-            # Try to close session in event loop
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    loop.create_task(self.close())
-            except:
-                pass
+    async def close(self):
+        """Close the aiohttp session milik setiap provider"""
+        await self.router.close()
@@ -0,0 +1,368 @@
+import os
+import copy
+import gzip
+import json
+import time
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_VERSION = 1
+
+
+def conversation_key(conversation: Dict[str, Any]) -> tuple:
+    return (conversation.get('id'), conversation.get('timestamp'))
+
+
+def merge_conversations(existing: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Gabungkan dua daftar percakapan tanpa duplikat (berdasarkan id + timestamp)
+    """
+    seen = {conversation_key(conversation) for conversation in existing}
+    merged = list(existing)
+    for conversation in new:
+        key = conversation_key(conversation)
+        if key not in seen:
+            seen.add(key)
+            merged.append(conversation)
+    return merged
+
+
+class HistoryArchive:
+    """
+    Arsip history per bulan: JSONL yang dikompres per blok (gzip member)
+    beserta index offset
+
+    archive_YYYY-MM[.N].jsonl.gz berisi gzip member yang berdiri sendiri;
+    setiap member memuat maksimal block_size percakapan dari satu tanggal.
+    archive_YYYY-MM.idx.json mencatat file data yang aktif serta offset dan
+    panjang setiap blok per tanggal, sehingga satu halaman percakapan cukup
+    membaca dan men-decompress blok yang dibutuhkan saja. Penulisan ulang
+    bulan membuat file data generasi baru (.N) dan index baru menunjuk ke
+    file tersebut, jadi index tidak pernah menunjuk ke offset file lain.
+    """
+
+    def __init__(self, path: Path, block_size: int = 50, compress_level: int = 6):
+        self.path = path
+        self.block_size = max(1, block_size)
+        self.compress_level = compress_level
+
+        # Cache index per bulan: (mtime, index). Index yang sudah di-cache tidak
+        # pernah diubah di tempat; penulis menyalinnya lalu menyimpan index baru,
+        # sehingga pembaca cukup memakai snapshot tanpa menunggu lock.
+        self._indexes: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        # Hanya penulis (compaction, hapus, retensi) yang memegang lock ini
+        self._lock = threading.RLock()
+        self._read_latencies: Deque[float] = deque(maxlen=200)
+
+    def _data_path(self, month: str, index: Dict[str, Any]) -> Path:
+        return self.path / index.get("file", f"archive_{month}.jsonl.gz")
+
+    def _data_files(self, month: str) -> List[Path]:
+        """
+        Semua generasi file data bulan ini yang ada di disk
+        """
+        return [
+            self.path / name for name in os.listdir(self.path)
+            if name.startswith(f"archive_{month}.") and name.endswith(".jsonl.gz")
+        ]
+
+    def _index_path(self, month: str) -> Path:
+        return self.path / f"archive_{month}.idx.json"
+
+    def months(self) -> List[str]:
+        if not self.path.exists():
+            return []
+        return sorted(
+            name[len("archive_"):-len(".idx.json")]
+            for name in os.listdir(self.path)
+            if name.startswith("archive_") and name.endswith(".idx.json")
+        )
+
+    def _load_index(self, month: str) -> Dict[str, Any]:
+        """
+        Snapshot index bulan dari cache; dibaca ulang jika file index berubah
+        (jangan diubah, salin dengan _copy_index untuk menulis)
+        """
+        index_path = self._index_path(month)
+        try:
+            mtime = index_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._indexes.pop(month, None)
+            return {"version": ARCHIVE_VERSION, "days": {}}
+
+        cached = self._indexes.get(month)
+        if cached is None or cached[0] != mtime:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                cached = (mtime, json.load(f))
+            self._indexes[month] = cached
+
+        return cached[1]
+
+    def _copy_index(self, month: str) -> Dict[str, Any]:
+        return copy.deepcopy(self._load_index(month))
+
+    def _save_index(self, month: str, index: Dict[str, Any]):
+        """
+        Tulis index secara atomik (file sementara lalu rename)
+        """
+        index_path = self._index_path(month)
+        temp_path = index_path.with_suffix(".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, index_path)
+
+        self._indexes[month] = (index_path.stat().st_mtime_ns, index)
+
+    def days(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Ringkasan semua tanggal di arsip: {tanggal: {count, first, last}}
+        """
+        summary = {}
+        for month in self.months():
+            for date_str, day in self._load_index(month)["days"].items():
+                summary[date_str] = {"count": day["count"], "first": day["first"], "last": day["last"]}
+        return summary
+
+    def count(self, date_str: str) -> int:
+        day = self._load_index(date_str[:7])["days"].get(date_str)
+        return day["count"] if day else 0
+
+    def append_day(self, date_str: str, conversations: List[Dict[str, Any]]):
+        """
+        Tambahkan percakapan satu tanggal ke arsip bulannya
+
+        Data ditulis dan di-fsync sebelum index, jadi crash di tengah jalan
+        hanya meninggalkan byte yatim yang tidak direferensikan index.
+        """
+        if not conversations:
+            return
+
+        month = date_str[:7]
+        conversations = sorted(conversations, key=lambda x: x.get('timestamp', ''))
+
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            index = self._copy_index(month)
+            day = index["days"].setdefault(date_str, {"count": 0, "first": None, "last": None, "blocks": []})
+
+            # Percakapan terlambat untuk tanggal yang sudah diarsip disisipkan
+            # berdasarkan timestamp, jadi blok tanggal tersebut ditulis ulang.
+            # Percakapan yang sudah ada di arsip (compaction yang diulang
+            # setelah crash) tidak ditambahkan lagi.
+            if day["blocks"]:
+                conversations = sorted(
+                    merge_conversations(self._read_blocks(self._data_path(month, index), day["blocks"]), conversations),
+                    key=lambda x: x.get('timestamp', '')
+                )
+                day["blocks"] = []
+
+            index.setdefault("file", f"archive_{month}.jsonl.gz")
+            data_path = self._data_path(month, index)
+            with open(data_path, 'ab') as f:
+                offset = f.tell()
+                for start in range(0, len(conversations), self.block_size):
+                    block = conversations[start:start + self.block_size]
+                    raw = "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in block).encode('utf-8')
+                    member = gzip.compress(raw, compresslevel=self.compress_level)
+                    f.write(member)
+                    day["blocks"].append({
+                        "offset": offset,
+                        "length": len(member),
+                        "count": len(block),
+                        "raw_bytes": len(raw)
+                    })
+                    offset += len(member)
+                f.flush()
+                os.fsync(f.fileno())
+
+            day["count"] = len(conversations)
+            day["first"] = conversations[0].get('timestamp')
+            day["last"] = conversations[-1].get('timestamp')
+            self._save_index(month, index)
+
+            # Blok lama tanggal ini (jika ada) sudah tidak direferensikan
+            if self._garbage_bytes(month, index) > data_path.stat().st_size // 2:
+                self._rewrite_month(month, index)
+
+    def _read_blocks(self, data_path: Path, blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        conversations = []
+        with open(data_path, 'rb') as f:
+            for block in blocks:
+                f.seek(block["offset"])
+                raw = gzip.decompress(f.read(block["length"]))
+                conversations.extend(json.loads(line) for line in raw.decode('utf-8').splitlines() if line)
+        return conversations
+
+    def read_day(self, date_str: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Ambil percakapan satu tanggal (urut timestamp); dengan offset/limit
+        hanya blok yang mencakup halaman tersebut yang di-decompress
+        """
+        if offset < 0 or (limit is not None and limit < 1):
+            raise ValueError("offset harus >= 0 dan limit >= 1")
+
+        started = time.perf_counter()
+        month = date_str[:7]
+
+        # Tanpa lock: snapshot index selalu cocok dengan file data yang
+        # ditunjuknya. Jika file itu baru saja diganti generasi baru oleh
+        # compaction, ulangi dengan index terbaru.
+        for attempt in range(2):
+            index = self._load_index(month)
+            day = index["days"].get(date_str)
+            if not day:
+                return []
+
+            end = day["count"] if limit is None else min(day["count"], offset + limit)
+            selected = []
+            skipped = 0
+            position = 0
+            for block in day["blocks"]:
+                if position + block["count"] > offset and position < end:
+                    if not selected:
+                        skipped = position
+                    selected.append(block)
+                position += block["count"]
+
+            try:
+                conversations = self._read_blocks(self._data_path(month, index), selected) if selected else []
+                break
+            except FileNotFoundError:
+                if attempt:
+                    raise
+                self._indexes.pop(month, None)
+
+        conversations = conversations[offset - skipped:end - skipped]
+
+        self._read_latencies.append(time.perf_counter() - started)
+        return conversations
+
+    def delete_day(self, date_str: str) -> bool:
+        """
+        Hapus satu tanggal dari arsip (file bulan ditulis ulang tanpa blok tersebut)
+        """
+        month = date_str[:7]
+        with self._lock:
+            index = self._copy_index(month)
+            if date_str not in index["days"]:
+                return False
+            del index["days"][date_str]
+            self._rewrite_month(month, index)
+        return True
+
+    def expire_before(self, cutoff: str) -> List[str]:
+        """
+        Hapus semua tanggal < cutoff (YYYY-MM-DD); kembalikan tanggal yang dihapus
+        """
+        expired = []
+        with self._lock:
+            for month in self.months():
+                if month > cutoff[:7]:
+                    break
+                index = self._copy_index(month)
+                old_days = [date_str for date_str in index["days"] if date_str < cutoff]
+                if not old_days:
+                    continue
+                for date_str in old_days:
+                    del index["days"][date_str]
+                expired.extend(old_days)
+                self._rewrite_month(month, index)
+        return sorted(expired)
+
+    def _garbage_bytes(self, month: str, index: Dict[str, Any]) -> int:
+        used = sum(block["length"] for day in index["days"].values() for block in day["blocks"])
+        return self._data_path(month, index).stat().st_size - used
+
+    def _rewrite_month(self, month: str, index: Dict[str, Any]):
+        """
+        Salin blok yang masih direferensikan ke file data generasi baru (tanpa
+        kompresi ulang), simpan index yang menunjuk ke file itu, lalu hapus
+        file lama; bulan tanpa tanggal dihapus
+
+        Crash sebelum index tersimpan hanya meninggalkan file generasi baru
+        yang belum direferensikan; index lama tetap valid untuk file lama.
+        """
+        if not index["days"]:
+            # Index dihapus lebih dulu supaya tidak ada index yang menunjuk ke file yang hilang
+            index_path = self._index_path(month)
+            if index_path.exists():
+                os.remove(index_path)
+            self._indexes.pop(month, None)
+            self._remove_stale_files(month, keep=None)
+            return
+
+        # Index yang diberikan bisa sudah menjadi snapshot pembaca
+        index = copy.deepcopy(index)
+        old_path = self._data_path(month, index)
+        generation = index.get("generation", 0) + 1
+        new_name = f"archive_{month}.{generation}.jsonl.gz"
+
+        with open(old_path, 'rb') as source, open(self.path / new_name, 'wb') as target:
+            for date_str in sorted(index["days"]):
+                for block in index["days"][date_str]["blocks"]:
+                    source.seek(block["offset"])
+                    member = source.read(block["length"])
+                    block["offset"] = target.tell()
+                    target.write(member)
+            target.flush()
+            os.fsync(target.fileno())
+
+        index["file"] = new_name
+        index["generation"] = generation
+        self._save_index(month, index)
+        self._remove_stale_files(month, keep=new_name)
+
+    def _remove_stale_files(self, month: str, keep: Optional[str]):
+        """
+        Hapus generasi file data yang tidak lagi direferensikan index (file yang
+        masih terkunci, mis. di Windows, dicoba lagi pada penulisan ulang berikutnya)
+        """
+        for path in self._data_files(month):
+            if path.name == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Cannot remove stale archive file {path}: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Ukuran arsip di disk, rasio kompresi, dan latency baca arsip
+        """
+        archive_bytes = 0
+        raw_bytes = 0
+        days = 0
+        conversations = 0
+        months = self.months()
+        for month in months:
+            index = self._load_index(month)
+            for path in (self._data_path(month, index), self._index_path(month)):
+                try:
+                    archive_bytes += path.stat().st_size
+                except FileNotFoundError:
+                    continue
+            for day in index["days"].values():
+                days += 1
+                conversations += day["count"]
+                raw_bytes += sum(block["raw_bytes"] for block in day["blocks"])
+
+        latencies = sorted(self._read_latencies)
+        return {
+            "archive_files": len(months),
+            "archive_bytes": archive_bytes,
+            "archived_days": days,
+            "archived_conversations": conversations,
+            "compression_ratio": round(raw_bytes / archive_bytes, 2) if archive_bytes else None,
+            "cold_read_ms": {
+                "reads": len(latencies),
+                "p50": round(latencies[len(latencies) // 2] * 1000, 3),
+                "p99": round(latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] * 1000, 3)
+            } if latencies else {"reads": 0}
+        }
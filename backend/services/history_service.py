@@ -1,11 +1,14 @@
 import os
 import json
 import glob
+import threading
 from datetime import datetime, date, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pathlib import Path
 import logging
 
+from .history_archive import HistoryArchive, merge_conversations
+
 logger = logging.getLogger(__name__)
 
 class HistoryService:
@@ -13,11 +16,54 @@ class HistoryService:
     Service untuk menyimpan dan mengambil riwayat chat
     """
     
-    def __init__(self):
-        self.base_path = Path(__file__).parent.parent.parent / "rag-data" / "data-history"
+    def __init__(self, base_path: Optional[Path] = None):
+        self.base_path = base_path or Path(__file__).parent.parent.parent / "rag-data" / "data-history"
         
         # Pastikan folder history ada
         os.makedirs(self.base_path, exist_ok=True)
+        
+        # Tier penyimpanan: HISTORY_HOT_DAYS hari terakhir tetap sebagai chat_*.json,
+        # hari yang lebih lama dipadatkan ke arsip terkompresi di archive/.
+        # HISTORY_RETENTION_DAYS = 0 berarti history disimpan selamanya.
+        self.hot_days = max(1, int(os.getenv("HISTORY_HOT_DAYS", "7")))
+        self.retention_days = max(0, int(os.getenv("HISTORY_RETENTION_DAYS", "0")))
+        self.compaction_interval = float(os.getenv("HISTORY_COMPACTION_INTERVAL", "3600"))
+        self.archive = HistoryArchive(
+            self.base_path / "archive",
+            block_size=int(os.getenv("HISTORY_ARCHIVE_BLOCK_SIZE", "50"))
+        )
+        
+        self._compaction_lock = threading.Lock()
+        # Melindungi baca-ubah-tulis file harian (save_chat) dari compaction
+        # yang memindahkan file yang sama
+        self._hot_lock = threading.Lock()
+        self._last_compaction: Optional[Dict[str, Any]] = None
+    
+    def _hot_files(self) -> Dict[str, str]:
+        """
+        File history harian yang belum diarsip: {tanggal: path}
+        """
+        pattern = str(self.base_path / "chat_*.json")
+        return {
+            os.path.basename(file_path)[len("chat_"):-len(".json")]: file_path
+            for file_path in glob.glob(pattern)
+        }
+    
+    def _archiving_path(self, date_str: str) -> Path:
+        """
+        File harian yang sedang dipindahkan ke arsip oleh compaction
+        """
+        return self.base_path / f"chat_{date_str}.json.archiving"
+    
+    def list_dates(self) -> List[str]:
+        """
+        Semua tanggal yang punya history (file harian maupun arsip)
+        """
+        return sorted(set(self._hot_files()) | set(self.archive.days()))
+    
+    def _read_hot_file(self, file_path: str) -> List[Dict[str, Any]]:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
     
     def save_chat(self, question: str, answer: str, timestamp: str, sources: List[str] = None) -> bool:
         """
@@ -40,22 +86,23 @@ class HistoryService:
                 "id": dt.strftime("%Y%m%d_%H%M%S")  # Unique ID berdasarkan timestamp
             }
             
-            # Baca file existing atau buat baru
-            existing_data = []
-            if file_path.exists():
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        existing_data = json.load(f)
-                except json.JSONDecodeError:
-                    logger.warning(f"Invalid JSON in {file_path}, creating new file")
-                    existing_data = []
-            
-            # Tambah percakapan baru
-            existing_data.append(conversation)
-            
-            # Simpan kembali ke file
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(existing_data, f, indent=2, ensure_ascii=False)
+            with self._hot_lock:
+                # Baca file existing atau buat baru
+                existing_data = []
+                if file_path.exists():
+                    try:
+                        with open(file_path, 'r', encoding='utf-8') as f:
+                            existing_data = json.load(f)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Invalid JSON in {file_path}, creating new file")
+                        existing_data = []
+                
+                # Tambah percakapan baru
+                existing_data.append(conversation)
+                
+                # Simpan kembali ke file
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    json.dump(existing_data, f, indent=2, ensure_ascii=False)
             
             logger.info(f"Chat saved to {file_path}")
             return True
@@ -64,9 +111,10 @@ class HistoryService:
             logger.error(f"Error saving chat: {str(e)}")
             return False
     
-    def get_history_by_date(self, date_str: str) -> List[Dict[str, Any]]:
+    def get_history_by_date(self, date_str: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        Ambil history chat berdasarkan tanggal (format: YYYY-MM-DD)
+        Ambil history chat berdasarkan tanggal (format: YYYY-MM-DD), dari
+        file harian maupun arsip; offset/limit untuk membaca per halaman
         """
         try:
             # Validasi format tanggal
@@ -74,19 +122,27 @@ class HistoryService:
                 datetime.strptime(date_str, "%Y-%m-%d")
             except ValueError:
                 raise ValueError("Format tanggal harus YYYY-MM-DD")
+            if offset < 0 or (limit is not None and limit < 1):
+                raise ValueError("offset harus >= 0 dan limit >= 1")
             
-            file_path = self.base_path / f"chat_{date_str}.json"
+            hot_data = None
+            for file_path in (self.base_path / f"chat_{date_str}.json", self._archiving_path(date_str)):
+                try:
+                    hot_data = (hot_data or []) + self._read_hot_file(str(file_path))
+                except FileNotFoundError:
+                    continue
             
-            if not file_path.exists():
-                return []
+            if hot_data is None:
+                # Hanya di arsip: cukup decompress blok untuk halaman yang diminta
+                return self.archive.read_day(date_str, offset, limit)
             
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # File yang sedang diarsip bisa sudah sebagian ada di arsip
+            data = merge_conversations(self.archive.read_day(date_str), hot_data)
             
             # Sort berdasarkan timestamp
             data.sort(key=lambda x: x.get('timestamp', ''))
             
-            return data
+            return data[offset:] if limit is None else data[offset:offset + limit]
             
         except Exception as e:
             logger.error(f"Error getting history for {date_str}: {str(e)}")
@@ -121,19 +177,14 @@ class HistoryService:
     def count_total_conversations(self) -> int:
         """
         Hitung total jumlah percakapan dalam semua history
+        (arsip dihitung dari index tanpa membuka datanya)
         """
         try:
-            total = 0
-            
-            # Cari semua file chat_*.json
-            pattern = str(self.base_path / "chat_*.json")
-            history_files = glob.glob(pattern)
+            total = sum(day["count"] for day in self.archive.days().values())
             
-            for file_path in history_files:
+            for file_path in self._hot_files().values():
                 try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    total += len(data)
+                    total += len(self._read_hot_file(file_path))
                 except Exception as e:
                     logger.warning(f"Error reading {file_path}: {str(e)}")
                     continue
@@ -157,22 +208,23 @@ class HistoryService:
                 "conversations_by_date": {}
             }
             
-            # Cari semua file chat_*.json
-            pattern = str(self.base_path / "chat_*.json")
-            history_files = glob.glob(pattern)
-            
             all_timestamps = []
             
-            for file_path in history_files:
+            # Hari yang sudah diarsip: jumlah dan rentang waktu ada di index
+            for date_str, day in self.archive.days().items():
+                stats["total_conversations"] += day["count"]
+                stats["conversations_by_date"][date_str] = day["count"]
+                all_timestamps.extend(timestamp for timestamp in (day["first"], day["last"]) if timestamp)
+            
+            for date_from_filename, file_path in self._hot_files().items():
                 try:
-                    date_from_filename = os.path.basename(file_path).replace("chat_", "").replace(".json", "")
-                    
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
+                    data = self._read_hot_file(file_path)
                     
                     conversation_count = len(data)
                     stats["total_conversations"] += conversation_count
-                    stats["conversations_by_date"][date_from_filename] = conversation_count
+                    stats["conversations_by_date"][date_from_filename] = (
+                        stats["conversations_by_date"].get(date_from_filename, 0) + conversation_count
+                    )
                     
                     # Collect timestamps
                     for chat in data:
@@ -183,7 +235,7 @@ class HistoryService:
                     logger.warning(f"Error processing {file_path}: {str(e)}")
                     continue
             
-            stats["total_days"] = len(history_files)
+            stats["total_days"] = len(stats["conversations_by_date"])
             
             if all_timestamps:
                 all_timestamps.sort()
@@ -202,19 +254,109 @@ class HistoryService:
     
     def delete_history_by_date(self, date_str: str) -> bool:
         """
-        Hapus history berdasarkan tanggal
+        Hapus history berdasarkan tanggal (file harian dan arsip)
         """
         try:
-            file_path = self.base_path / f"chat_{date_str}.json"
+            deleted = False
+            with self._hot_lock:
+                for file_path in (self.base_path / f"chat_{date_str}.json", self._archiving_path(date_str)):
+                    if file_path.exists():
+                        os.remove(file_path)
+                        deleted = True
+            if self.archive.delete_day(date_str):
+                deleted = True
             
-            if file_path.exists():
-                os.remove(file_path)
+            if deleted:
                 logger.info(f"Deleted history for {date_str}")
-                return True
             else:
                 logger.warning(f"No history found for {date_str}")
-                return False
+            return deleted
                 
         except Exception as e:
             logger.error(f"Error deleting history for {date_str}: {str(e)}")
             return False
+    
+    def compact(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Pindahkan file harian di luar HISTORY_HOT_DAYS ke arsip dan hapus
+        history yang lebih tua dari HISTORY_RETENTION_DAYS
+        """
+        today = today or date.today()
+        hot_cutoff = (today - timedelta(days=self.hot_days - 1)).strftime("%Y-%m-%d")
+        retention_cutoff = None
+        if self.retention_days:
+            retention_cutoff = (today - timedelta(days=self.retention_days - 1)).strftime("%Y-%m-%d")
+        
+        result = {"compacted_days": 0, "archived_conversations": 0, "expired_days": 0}
+        
+        with self._compaction_lock:
+            # File .archiving sisa compaction yang terputus (crash, file terkunci)
+            # diselesaikan dulu; append_day mengabaikan percakapan yang sudah diarsip
+            pending = sorted(glob.glob(str(self.base_path / "chat_*.json.archiving")))
+            for marker_path in pending:
+                date_str = os.path.basename(marker_path)[len("chat_"):-len(".json.archiving")]
+                self._archive_marker(date_str, retention_cutoff, result)
+            
+            for date_str, file_path in sorted(self._hot_files().items()):
+                if date_str >= hot_cutoff or self._archiving_path(date_str).exists():
+                    continue
+                try:
+                    # Pindahkan file dulu supaya save_chat tidak menulis ke file
+                    # yang sedang diarsip dan compaction berikutnya tidak
+                    # mengarsip ulang file yang sama
+                    with self._hot_lock:
+                        os.replace(file_path, self._archiving_path(date_str))
+                except Exception as e:
+                    logger.warning(f"Error compacting {file_path}: {str(e)}")
+                    continue
+                self._archive_marker(date_str, retention_cutoff, result)
+            
+            if retention_cutoff:
+                result["expired_days"] += len(self.archive.expire_before(retention_cutoff))
+            
+            self._last_compaction = {"timestamp": datetime.now().isoformat(), **result}
+        
+        if result["compacted_days"] or result["expired_days"]:
+            logger.info(f"History compaction: {result}")
+        return result
+    
+    def _archive_marker(self, date_str: str, retention_cutoff: Optional[str], result: Dict[str, Any]):
+        """
+        Arsipkan (atau hapus jika lewat retensi) file .archiving satu tanggal
+        """
+        marker_path = self._archiving_path(date_str)
+        try:
+            if retention_cutoff and date_str < retention_cutoff:
+                os.remove(marker_path)
+                result["expired_days"] += 1
+                return
+            
+            data = self._read_hot_file(str(marker_path))
+            self.archive.append_day(date_str, data)
+            # File baru dihapus setelah index arsip tersimpan
+            os.remove(marker_path)
+            result["compacted_days"] += 1
+            result["archived_conversations"] += len(data)
+        except Exception as e:
+            logger.warning(f"Error compacting {marker_path}: {str(e)}")
+    
+    def get_storage_stats(self) -> Dict[str, Any]:
+        """
+        Penggunaan disk file harian dan arsip, serta latency baca arsip
+        """
+        hot_files = self._hot_files()
+        hot_bytes = 0
+        for file_path in hot_files.values():
+            try:
+                hot_bytes += os.path.getsize(file_path)
+            except OSError:
+                continue
+        
+        return {
+            "hot_days": self.hot_days,
+            "retention_days": self.retention_days,
+            "hot_files": len(hot_files),
+            "hot_bytes": hot_bytes,
+            **self.archive.get_stats(),
+            "last_compaction": self._last_compaction
+        }
@@ -0,0 +1,427 @@
+import time
+import math
+import random
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import logging
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderError(Exception):
+    """
+    Provider LLM gagal memberikan jawaban (HTTP error, timeout, response kosong)
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class LLMUnavailableError(Exception):
+    """
+    Semua provider LLM gagal atau sedang diputus oleh circuit breaker
+    """
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMProvider:
+    """
+    Interface provider LLM: terima prompt, kembalikan teks jawaban
+    atau raise ProviderError
+    """
+
+    name = "provider"
+
+    async def generate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class GeminiProvider(LLMProvider):
+    """
+    Provider untuk model Gemini (generateContent)
+    """
+
+    BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+
+    def __init__(self, model: str, api_key: str, base_url: Optional[str] = None):
+        self.name = model
+        self.model = model
+        self.api_key = api_key
+        self.base_url = base_url or self.BASE_URL.format(model=model)
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get or create aiohttp session"""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession()
+        return self.session
+
+    async def generate(self, prompt: str) -> str:
+        url = f"{self.base_url}?key={self.api_key}"
+
+        payload = {
+            "contents": [
+                {
+                    "parts": [
+                        {
+                            "text": prompt
+                        }
+                    ]
+                }
+            ],
+            "generationConfig": {
+                "temperature": 0.7,
+                "topK": 40,
+                "topP": 0.95,
+                "maxOutputTokens": 2048,
+            },
+            "safetySettings": [
+                {
+                    "category": "HARM_CATEGORY_HARASSMENT",
+                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+                },
+                {
+                    "category": "HARM_CATEGORY_HATE_SPEECH",
+                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+                },
+                {
+                    "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+                },
+                {
+                    "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
+                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+                }
+            ]
+        }
+
+        headers = {
+            "Content-Type": "application/json"
+        }
+
+        session = await self._get_session()
+
+        async with session.post(url, json=payload, headers=headers) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                logger.error(f"Gemini API error ({self.model}): {response.status} - {error_text}")
+                raise ProviderError(f"Error dari Gemini API: {response.status}", status=response.status)
+
+            result = await response.json()
+
+            # Extract response text
+            if "candidates" in result and len(result["candidates"]) > 0:
+                candidate = result["candidates"][0]
+                if "content" in candidate and "parts" in candidate["content"]:
+                    return candidate["content"]["parts"][0]["text"]
+
+            raise ProviderError("Tidak ada response yang valid dari Gemini API")
+
+    async def close(self):
+        """Close the aiohttp session"""
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+
+class StubProvider(LLMProvider):
+    """
+    Provider lokal untuk development dan pengujian: latency dan tingkat
+    error bisa diatur, tidak memanggil jaringan
+    """
+
+    def __init__(self, name: str = "stub", answer: Optional[str] = None,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0):
+        self.name = name
+        self.answer = answer
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls = 0
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        if random.random() < self.error_rate:
+            raise ProviderError(f"Stub provider {self.name} gagal", status=503)
+        if self.answer is not None:
+            return self.answer
+        return f"[{self.name}] Jawaban stub untuk prompt sepanjang {len(prompt)} karakter"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker per provider berdasarkan error rate dan latency terkini
+
+    closed: request normal; open: provider dilewati selama cooldown;
+    half_open: satu request percobaan, sukses menutup kembali breaker.
+    """
+
+    def __init__(self, window: int = 20, min_requests: int = 5, error_rate: float = 0.5,
+                 max_latency: float = 0.0, cooldown: float = 30.0, name: str = "provider"):
+        self.name = name
+        self.min_requests = min_requests
+        self.error_rate_threshold = error_rate
+        self.max_latency = max_latency
+        self.cooldown = cooldown
+
+        self.state = "closed"
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._outcomes: Deque[Tuple[bool, float]] = deque(maxlen=window)
+
+    def allow(self) -> bool:
+        """
+        Apakah provider boleh dipanggil sekarang
+        """
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            self.state = "half_open"
+            self._trial_in_flight = False
+
+        if self.state == "half_open":
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+
+        return True
+
+    def record(self, success: bool, latency: float):
+        """
+        Catat hasil satu request lalu evaluasi state breaker
+        """
+        self._outcomes.append((success, latency))
+
+        if self.state == "half_open":
+            self._trial_in_flight = False
+            if success:
+                self.state = "closed"
+                self._outcomes.clear()
+                self._outcomes.append((success, latency))
+            else:
+                self._open()
+            return
+
+        if len(self._outcomes) >= self.min_requests:
+            if self.error_rate() >= self.error_rate_threshold:
+                self._open()
+            elif self.max_latency and self.latency_percentile(0.5) > self.max_latency:
+                self._open()
+
+    def release(self):
+        """
+        Request dibatalkan (kalah hedge) tanpa hasil; bebaskan slot percobaan
+        """
+        if self.state == "half_open":
+            self._trial_in_flight = False
+
+    def _open(self):
+        self.state = "open"
+        self._opened_at = time.monotonic()
+        logger.warning(f"Circuit breaker opened for {self.name} (cooldown {self.cooldown}s)")
+
+    def retry_after(self) -> float:
+        """
+        Sisa waktu cooldown (detik) sebelum provider dicoba lagi
+        """
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.cooldown - (time.monotonic() - self._opened_at))
+
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for success, _ in self._outcomes if not success) / len(self._outcomes)
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """
+        Percentile latency dari request yang sukses, None jika belum ada data
+        """
+        latencies = sorted(latency for success, latency in self._outcomes if success)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(percentile * len(latencies)))]
+
+
+class ProviderRouter:
+    """
+    Kirim prompt ke daftar provider berurutan dengan hedging dan fallback
+
+    - Hedging: jika request belum selesai setelah melewati percentile
+      latency provider tersebut, request kedua dikirim ke provider
+      berikutnya (atau sekali lagi ke provider yang sama jika router hanya
+      berisi satu provider); jawaban sukses pertama yang dipakai.
+    - Fallback: jika request gagal, provider berikutnya langsung dicoba.
+    - Provider yang circuit breaker-nya terbuka dilewati. Breaker hanya
+      menghitung 5xx, 404, 429, timeout, dan error koneksi; error 4xx lain
+      berasal dari request itu sendiri.
+    """
+
+    def __init__(self, providers: List[LLMProvider], hedge_percentile: float = 0.95,
+                 hedge_min_delay: float = 1.0, request_timeout: float = 30.0,
+                 breaker_factory=CircuitBreaker):
+        self.providers = providers
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.request_timeout = request_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        for provider in providers:
+            breaker = breaker_factory()
+            breaker.name = provider.name
+            self.breakers[provider.name] = breaker
+
+        self._stats: Dict[str, Dict[str, int]] = {
+            provider.name: {"requests": 0, "successes": 0, "failures": 0, "cancelled": 0}
+            for provider in providers
+        }
+        self._hedges = 0
+        self._fallbacks = 0
+
+    def _hedge_delay(self, provider: LLMProvider) -> float:
+        latency = self.breakers[provider.name].latency_percentile(self.hedge_percentile)
+        if latency is None:
+            return max(self.hedge_min_delay, self.request_timeout / 2)
+        return max(self.hedge_min_delay, latency)
+
+    async def _attempt(self, provider: LLMProvider, prompt: str) -> str:
+        breaker = self.breakers[provider.name]
+        stats = self._stats[provider.name]
+        stats["requests"] += 1
+        started = time.monotonic()
+
+        try:
+            answer = await asyncio.wait_for(provider.generate(prompt), timeout=self.request_timeout)
+        except asyncio.CancelledError:
+            stats["cancelled"] += 1
+            breaker.release()
+            raise
+        except asyncio.TimeoutError:
+            stats["failures"] += 1
+            breaker.record(False, time.monotonic() - started)
+            raise ProviderError(f"Timeout dari provider {provider.name}")
+        except Exception as e:
+            stats["failures"] += 1
+            status = getattr(e, "status", None)
+            if status is not None and 400 <= status < 500 and status not in (404, 429):
+                # Error dari sisi client (prompt tidak valid/terlalu besar) bukan
+                # tanda provider bermasalah, jadi tidak dihitung circuit breaker;
+                # 429 (quota/rate limit) tetap dihitung sebagai tanda overload
+                breaker.release()
+            else:
+                breaker.record(False, time.monotonic() - started)
+            if isinstance(e, ProviderError):
+                raise
+            raise ProviderError(f"{provider.name}: {str(e)}")
+
+        stats["successes"] += 1
+        breaker.record(True, time.monotonic() - started)
+        return answer
+
+    def _next_provider(self, remaining: List[LLMProvider]) -> Optional[LLMProvider]:
+        while remaining:
+            provider = remaining.pop(0)
+            if self.breakers[provider.name].allow():
+                return provider
+        return None
+
+    async def generate(self, prompt: str) -> str:
+        """
+        Jawaban sukses pertama dari provider, atau raise LLMUnavailableError
+        """
+        remaining = list(self.providers)
+        pending: Dict[asyncio.Task, LLMProvider] = {}
+        errors: List[str] = []
+
+        duplicated = False
+
+        def _start(provider: LLMProvider):
+            task = asyncio.create_task(self._attempt(provider, prompt))
+            pending[task] = provider
+
+        def _launch() -> bool:
+            provider = self._next_provider(remaining)
+            if provider is None:
+                return False
+            _start(provider)
+            return True
+
+        def _can_duplicate(provider: LLMProvider) -> bool:
+            # Request yang sama dikirim ulang ke provider yang sedang berjalan
+            # (sekali per prompt) hanya jika router berisi satu provider;
+            # percobaan half-open tidak diduplikasi
+            return (len(self.providers) == 1 and not duplicated
+                    and self.breakers[provider.name].state == "closed")
+
+        if not _launch():
+            raise LLMUnavailableError("Semua provider LLM sedang tidak tersedia", self._retry_after())
+
+        try:
+            while pending:
+                # Hedge setelah provider terakhir yang diluncurkan melewati percentile latency-nya
+                newest = list(pending.values())[-1]
+                can_hedge = bool(remaining) or _can_duplicate(newest)
+                timeout = self._hedge_delay(newest) if can_hedge else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    if _launch():
+                        self._hedges += 1
+                    elif _can_duplicate(newest):
+                        _start(newest)
+                        duplicated = True
+                        self._hedges += 1
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    try:
+                        return task.result()
+                    except ProviderError as e:
+                        errors.append(f"{provider.name}: {str(e)}")
+                        logger.warning(f"LLM provider {provider.name} failed: {str(e)}")
+
+                if not pending and _launch():
+                    self._fallbacks += 1
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise LLMUnavailableError("Semua provider LLM gagal: " + "; ".join(errors), self._retry_after())
+
+    def _retry_after(self) -> int:
+        waits = [breaker.retry_after() for breaker in self.breakers.values() if breaker.state == "open"]
+        return max(1, math.ceil(min(waits))) if waits else 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Statistik per provider (state breaker, error rate, latency) dan hedging
+        """
+        providers = []
+        for provider in self.providers:
+            breaker = self.breakers[provider.name]
+            p50 = breaker.latency_percentile(0.5)
+            p95 = breaker.latency_percentile(0.95)
+            providers.append({
+                "name": provider.name,
+                "circuit": breaker.state,
+                "error_rate": round(breaker.error_rate(), 3),
+                "latency_p50": round(p50, 3) if p50 is not None else None,
+                "latency_p95": round(p95, 3) if p95 is not None else None,
+                **self._stats[provider.name]
+            })
+        return {"providers": providers, "hedged_requests": self._hedges, "fallbacks": self._fallbacks}
+
+    async def close(self):
+        for provider in self.providers:
+            await provider.close()
@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import random
+import hmac
+import cProfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _NullProfile:
+    """
+    Profile kosong untuk request yang tidak diprofile (tanpa overhead)
+    """
+
+    profile_id = None
+
+    @contextmanager
+    def section(self, name: str, collect: bool = True):
+        yield
+
+    def finish(self) -> Optional[str]:
+        return None
+
+
+NULL_PROFILE = _NullProfile()
+
+_collect_lock = threading.Lock()
+
+
+class RequestProfile:
+    """
+    cProfile untuk satu request; hanya aktif di dalam section sinkron
+    supaya coroutine lain yang berjalan selama await tidak ikut tercatat
+    """
+
+    def __init__(self, profiler: "RequestProfiler", trigger: str):
+        self._owner = profiler
+        self._profile = cProfile.Profile()
+        self.trigger = trigger
+        self.started_at = datetime.now()
+        self.profile_id = self.started_at.strftime("%Y%m%d_%H%M%S_%f")
+        self.sections: Dict[str, float] = {}
+
+    @contextmanager
+    def section(self, name: str, collect: bool = True):
+        """
+        Ukur durasi satu tahap request; jika collect=True tahap tersebut
+        juga direkam cProfile (jangan dipakai untuk tahap yang berisi await)
+        """
+        started = time.perf_counter()
+        # Section bisa berjalan di thread pool bersamaan dengan request lain;
+        # hanya satu cProfile yang boleh aktif, section lain cukup diukur durasinya
+        collect = collect and _collect_lock.acquire(blocking=False)
+        if collect:
+            self._profile.enable()
+        try:
+            yield
+        finally:
+            if collect:
+                self._profile.disable()
+                _collect_lock.release()
+            self.sections[name] = round((time.perf_counter() - started) * 1000, 3)
+
+    def finish(self) -> Optional[str]:
+        """
+        Simpan hasil profile ke disk; mengembalikan id profile
+        """
+        return self._owner.save(self)
+
+
+class RequestProfiler:
+    """
+    Profiling on-demand untuk request /chat
+
+    Request diprofile jika membawa header X-Profile (nilainya harus sama
+    dengan PROFILE_TOKEN) atau terpilih oleh sampling PROFILE_SAMPLE_RATE.
+    Profiling tidak diaktifkan tanpa PROFILE_TOKEN. Hasilnya disimpan sebagai file .prof (format
+    pstats) dalam ring berukuran tetap.
+    """
+
+    HEADER = "x-profile"
+
+    def __init__(self, base_path: Optional[Path] = None):
+        self.enabled = os.getenv("PROFILE_ENABLED", "false").lower() == "true"
+        self.sample_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+        self.token = os.getenv("PROFILE_TOKEN", "")
+        self.max_files = int(os.getenv("PROFILE_MAX_FILES", "20"))
+        self.base_path = base_path or Path(__file__).parent.parent.parent / "rag-data" / "data-profiles"
+
+        if self.enabled and not self.token:
+            # Tanpa token siapa pun bisa memicu profile dan membaca /admin/profiles
+            logger.warning("PROFILE_ENABLED=true tetapi PROFILE_TOKEN kosong; profiling dinonaktifkan")
+            self.enabled = False
+
+        if self.enabled:
+            os.makedirs(self.base_path, exist_ok=True)
+
+    def start(self, headers: Mapping[str, str]):
+        """
+        Mulai profile jika request ini perlu diprofile, selain itu NULL_PROFILE
+        """
+        if not self.enabled:
+            return NULL_PROFILE
+
+        header_value = headers.get(self.HEADER)
+        if header_value and self.is_authorized(header_value):
+            return RequestProfile(self, "header")
+
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return RequestProfile(self, "sample")
+
+        return NULL_PROFILE
+
+    def is_authorized(self, token: Optional[str]) -> bool:
+        """
+        Cek token untuk memicu profile dan mengakses endpoint admin
+        """
+        if not self.token or not token:
+            return False
+        return hmac.compare_digest(token, self.token)
+
+    def save(self, profile: RequestProfile) -> Optional[str]:
+        """
+        Tulis profile (.prof) dan metadata (.json), lalu buang file terlama
+        """
+        try:
+            stats_path = self.base_path / f"profile_{profile.profile_id}.prof"
+            profile._profile.dump_stats(str(stats_path))
+
+            metadata = {
+                "id": profile.profile_id,
+                "trigger": profile.trigger,
+                "started_at": profile.started_at.isoformat(),
+                "sections_ms": profile.sections
+            }
+            with open(self.base_path / f"profile_{profile.profile_id}.json", 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, indent=2)
+
+            self._trim()
+            return profile.profile_id
+
+        except Exception as e:
+            logger.error(f"Error saving profile: {str(e)}")
+            return None
+
+    def _trim(self):
+        """
+        Pertahankan hanya PROFILE_MAX_FILES profile terbaru
+        """
+        profiles = sorted(self.base_path.glob("profile_*.prof"))
+        for stats_path in profiles[:max(0, len(profiles) - self.max_files)]:
+            for path in (stats_path, stats_path.with_suffix(".json")):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """
+        Daftar profile yang tersimpan, terbaru lebih dulu
+        """
+        results = []
+
+        for stats_path in sorted(self.base_path.glob("profile_*.prof"), reverse=True):
+            entry = {
+                "name": stats_path.name,
+                "size_bytes": stats_path.stat().st_size
+            }
+            try:
+                with open(stats_path.with_suffix(".json"), 'r', encoding='utf-8') as f:
+                    entry.update(json.load(f))
+            except (OSError, json.JSONDecodeError):
+                pass
+            results.append(entry)
+
+        return results
+
+    def get_profile_path(self, name: str) -> Optional[Path]:
+        """
+        Path file profile berdasarkan nama (hanya nama yang ada di daftar)
+        """
+        for stats_path in self.base_path.glob("profile_*.prof"):
+            if stats_path.name == name:
+                return stats_path
+        return None
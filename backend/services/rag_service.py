@@ -1,10 +1,19 @@
 import os
 import json
 import glob
-from typing import Dict, List, Any
+import time
+import threading
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 import logging
 
+from .dedup import MinHashDeduplicator
+from .scoring_executor import (
+    KIND_ARTICLE, KIND_CODE, KIND_LIMITS, KIND_README,
+    Segment, ScoringExecutor, push_top_k, ranked_indices
+)
+from .term_index import IndonesianStemmer, TrigramIndex, tokenize
+
 logger = logging.getLogger(__name__)
 
 class RAGService:
@@ -12,11 +21,45 @@ class RAGService:
     Service untuk mengelola knowledge base dari data-artikel dan data-clone-github
     """
     
-    def __init__(self):
-        self.base_path = Path(__file__).parent.parent.parent / "rag-data"
+    ARTICLE_PATTERNS = ["*.txt", "*.md", "*.json"]
+    CODE_EXTENSIONS = ['.py', '.js', '.ts', '.java', '.cpp', '.c', '.html', '.css']
+
+    def __init__(self, base_path: Optional[Path] = None):
+        self.base_path = Path(base_path) if base_path else Path(__file__).parent.parent.parent / "rag-data"
         self.articles_path = self.base_path / "data-artikel"
         self.github_path = self.base_path / "data-clone-github"
         
+        # Pencocokan term: ekspansi typo via trigram dan stemming bahasa Indonesia
+        self.fuzzy_matching = os.getenv("RAG_FUZZY_MATCHING", "true").lower() == "true"
+        use_stemmer = os.getenv("RAG_INDONESIAN_STEMMER", "true").lower() == "true"
+        self.stemmer = IndonesianStemmer() if use_stemmer else None
+        self.term_index = TrigramIndex()
+        
+        # Near-duplicate (file vendored, README berulang) digabung saat ingest
+        dedup_enabled = os.getenv("RAG_DEDUP", "true").lower() == "true"
+        dedup_threshold = float(os.getenv("RAG_DEDUP_THRESHOLD", "0.85"))
+        self.deduplicator = MinHashDeduplicator(threshold=dedup_threshold) if dedup_enabled else None
+        
+        # Scoring paralel di worker process untuk corpus besar
+        self.parallel_threshold = int(os.getenv("RAG_PARALLEL_THRESHOLD", "20000"))
+        scoring_workers = int(os.getenv("RAG_SCORING_WORKERS", str(os.cpu_count() or 1)))
+        self.scoring_executor = None
+        if scoring_workers > 1:
+            self.scoring_executor = ScoringExecutor(scoring_workers, self.base_path / "data-index")
+        
+        # Dokumen hasil ingest (beserta segment scoring paralelnya), dibangun
+        # ulang jika ada file yang berubah. retrieve_context bisa dipanggil
+        # dari beberapa thread sekaligus: rebuild memegang lock dan hasilnya
+        # dipublikasikan sebagai satu tuple.
+        self._loaded: Tuple[List[Dict[str, Any]], Optional[Segment]] = ([], None)
+        self._corpus_signature = None
+        self._corpus_lock = threading.Lock()
+        
+        # Pemindaian file knowledge base (glob + stat semua file) paling
+        # sering sekali per RAG_REINDEX_INTERVAL detik; 0 = setiap query
+        self.reindex_interval = float(os.getenv("RAG_REINDEX_INTERVAL", "30"))
+        self._last_scan = None
+        
         # Pastikan folder ada
         os.makedirs(self.articles_path, exist_ok=True)
         os.makedirs(self.github_path, exist_ok=True)
@@ -24,11 +67,16 @@ class RAGService:
     def retrieve_context(self, question: str) -> Dict[str, Any]:
         """
         Retrieve context dari knowledge base berdasarkan pertanyaan
+        (blocking dan thread-safe; dari kode async jalankan di thread pool)
         """
         try:
+            corpus = self._ensure_corpus()
+            keywords = self._extract_keywords(question)
+            ranked = self._rank_documents(corpus, keywords)
+            
             # Gabungkan context dari artikel dan github projects
-            article_context = self._search_articles(question)
-            github_context = self._search_github_projects(question)
+            article_context = self._search_articles(corpus, ranked)
+            github_context = self._search_github_projects(corpus, ranked)
             
             # Kombinasikan hasil
             combined_context = {
@@ -37,9 +85,11 @@ class RAGService:
                 "sources": []
             }
             
-            # Tambahkan sources untuk tracking
-            combined_context["sources"].extend([item["source"] for item in article_context])
-            combined_context["sources"].extend([item["source"] for item in github_context])
+            # Tambahkan sources untuk tracking, termasuk near-duplicate yang digabung
+            for item in article_context + github_context:
+                for source in [item["source"]] + item["duplicates"]:
+                    if source not in combined_context["sources"]:
+                        combined_context["sources"].append(source)
             
             return combined_context
             
@@ -47,130 +97,261 @@ class RAGService:
             logger.error(f"Error retrieving context: {str(e)}")
             return {"articles": [], "github_projects": [], "sources": []}
     
-    def _search_articles(self, question: str) -> List[Dict[str, Any]]:
+    def _list_source_files(self) -> List[Dict[str, Any]]:
         """
-        Cari artikel yang relevan dengan pertanyaan
+        Daftar semua file knowledge base (artikel, README, dan file kode)
         """
-        results = []
+        entries = []
         
         try:
-            # Cari semua file artikel (txt, md, json)
-            article_files = []
-            for ext in ["*.txt", "*.md", "*.json"]:
-                article_files.extend(glob.glob(str(self.articles_path / "**" / ext), recursive=True))
+            for ext in self.ARTICLE_PATTERNS:
+                for file_path in glob.glob(str(self.articles_path / "**" / ext), recursive=True):
+                    entries.append({"type": "article", "path": file_path, "project": None})
+        except Exception as e:
+            logger.error(f"Error listing articles: {str(e)}")
+        
+        try:
+            for project_dir in os.listdir(self.github_path):
+                project_path = self.github_path / project_dir
+                if not os.path.isdir(project_path):
+                    continue
+                
+                readme_path = project_path / "README.md"
+                if readme_path.exists():
+                    entries.append({"type": "github_project", "path": str(readme_path), "project": project_dir})
+                
+                for ext in self.CODE_EXTENSIONS:
+                    for file_path in project_path.rglob(f"*{ext}"):
+                        entries.append({"type": "code_file", "path": str(file_path), "project": project_dir})
+        except Exception as e:
+            logger.error(f"Error listing GitHub projects: {str(e)}")
+        
+        return entries
+    
+    def _ensure_corpus(self) -> List[Dict[str, Any]]:
+        """
+        Ingest ulang knowledge base hanya jika ada file yang ditambah, dihapus, atau diubah
+        (diperiksa paling sering sekali per RAG_REINDEX_INTERVAL detik)
+        """
+        if self._fresh():
+            return self._loaded[0]
+        
+        with self._corpus_lock:
+            # Thread lain mungkin baru saja memindai selagi menunggu lock
+            if self._fresh():
+                return self._loaded[0]
             
-            for file_path in article_files:
+            entries = self._list_source_files()
+            
+            signature = []
+            for entry in entries:
                 try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    # Simple keyword matching (bisa diperbaiki dengan semantic search)
-                    if self._is_relevant(content, question):
-                        results.append({
-                            "content": content[:1000],  # Limit content
-                            "source": os.path.basename(file_path),
-                            "type": "article",
-                            "path": file_path
-                        })
-                        
-                except Exception as e:
-                    logger.warning(f"Error reading article {file_path}: {str(e)}")
+                    stat = os.stat(entry["path"])
+                    signature.append((entry["path"], stat.st_mtime_ns, stat.st_size))
+                except OSError:
                     continue
-                    
-        except Exception as e:
-            logger.error(f"Error searching articles: {str(e)}")
+            signature = tuple(signature)
+            
+            if signature != self._corpus_signature:
+                corpus = self._build_corpus(entries)
+                segment = None
+                if self.scoring_executor and len(corpus) >= self.parallel_threshold:
+                    segment = self.scoring_executor.load(corpus)
+                self._loaded = (corpus, segment)
+                self._corpus_signature = signature
+            
+            self._last_scan = time.monotonic()
+            return self._loaded[0]
+    
+    def _fresh(self) -> bool:
+        last_scan = self._last_scan
+        return last_scan is not None and time.monotonic() - last_scan < self.reindex_interval
+    
+    def _build_corpus(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Baca semua file, gabungkan near-duplicate, tokenisasi, dan bangun
+        vocabulary untuk ekspansi term
+        """
+        documents = []
         
-        return results[:5]  # Limit to top 5 results
+        for entry in entries:
+            file_path = entry["path"]
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except Exception as e:
+                logger.warning(f"Error reading {file_path}: {str(e)}")
+                continue
+            
+            if entry["type"] == "code_file" and len(content) >= 5000:  # Skip very large files
+                continue
+            
+            if entry["type"] == "article":
+                source = os.path.basename(file_path)
+                path = file_path
+            elif entry["type"] == "github_project":
+                source = f"GitHub: {entry['project']}"
+                path = str(self.github_path / entry["project"])
+            else:
+                source = f"Code: {os.path.basename(file_path)}"
+                path = file_path
+            
+            documents.append({
+                "content": content,
+                "source": source,
+                "type": entry["type"],
+                "path": path,
+                "project": entry["project"],
+                "duplicates": []
+            })
+        
+        # Near-duplicate hanya disimpan sebagai metadata di dokumen representatif
+        if self.deduplicator and len(documents) > 1:
+            signatures = [self.deduplicator.signature(document["content"]) for document in documents]
+            representatives = self.deduplicator.cluster(signatures)
+            for index, representative in enumerate(representatives):
+                if representative != index:
+                    documents[representative]["duplicates"].append({
+                        "source": documents[index]["source"],
+                        "path": documents[index]["path"]
+                    })
+            documents = [document for index, document in enumerate(documents)
+                         if representatives[index] == index]
+        
+        corpus = []
+        vocabulary = set()
+        project_groups: Dict[str, int] = {}
+        kinds = {"article": KIND_ARTICLE, "github_project": KIND_README, "code_file": KIND_CODE}
+        
+        for document in documents:
+            document["kind"] = kinds[document["type"]]
+            document["group"] = project_groups.setdefault(document["project"], len(project_groups))
+            
+            terms = set(tokenize(document["content"]))
+            if self.stemmer:
+                terms.update([self.stemmer.stem(term) for term in terms])
+            vocabulary.update(terms)
+            
+            document["content_lower"] = document["content"].lower()
+            document["terms"] = frozenset(terms)
+            corpus.append(document)
+        
+        # Index baru dibangun terpisah lalu ditukar, query yang sedang
+        # berjalan di thread lain tetap memakai index lama
+        term_index = TrigramIndex()
+        term_index.build(vocabulary)
+        self.term_index = term_index
+        
+        duplicates = sum(len(document["duplicates"]) for document in corpus)
+        logger.info(f"Knowledge base indexed: {len(corpus)} documents "
+                    f"({duplicates} near-duplicates merged), {len(vocabulary)} terms")
+        
+        return corpus
     
-    def _search_github_projects(self, question: str) -> List[Dict[str, Any]]:
+    def _extract_keywords(self, question: str) -> List[Tuple[str, ...]]:
         """
-        Cari GitHub projects yang relevan dengan pertanyaan
+        Ambil keyword dari pertanyaan beserta variannya (bentuk dasar dan
+        term vocabulary terdekat untuk kata yang salah ketik)
+        """
+        keywords = []
+        
+        for term in tokenize(question.lower()):
+            variants = [term]
+            
+            stem = self.stemmer.stem(term) if self.stemmer else term
+            if stem != term:
+                variants.append(stem)
+            
+            if self.fuzzy_matching and term not in self.term_index and stem not in self.term_index:
+                for candidate, _ in self.term_index.expand(term):
+                    if candidate not in variants:
+                        variants.append(candidate)
+            
+            keywords.append(tuple(variants))
+        
+        return keywords
+    
+    def _rank_documents(self, corpus: List[Dict[str, Any]], keywords: List[Tuple[str, ...]]) -> Dict[Tuple[int, int], List[Tuple[int, int]]]:
+        """
+        Skor dokumen yang relevan dan simpan top-k per grup (artikel, README
+        per project, file kode per project); corpus besar diskor paralel
+        """
+        loaded_corpus, segment = self._loaded
+        if segment is not None and loaded_corpus is corpus:
+            try:
+                return self.scoring_executor.rank(keywords, segment)
+            except Exception as e:
+                logger.warning(f"Parallel scoring failed, falling back to serial: {str(e)}")
+        
+        ranked: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        for index, document in enumerate(corpus):
+            score = self._relevance_score(document, keywords)
+            
+            # Return True if at least 1 keyword found or if content is short (likely important)
+            if score > 0 or len(document["content"]) < 200:
+                kind = document["kind"]
+                push_top_k(ranked, (kind, document["group"]), (score, -index), KIND_LIMITS[kind])
+        
+        return ranked
+    
+    def _search_articles(self, corpus: List[Dict[str, Any]], ranked: Dict[Tuple[int, int], List[Tuple[int, int]]]) -> List[Dict[str, Any]]:
+        """
+        Ambil artikel yang paling relevan dengan pertanyaan
         """
         results = []
         
         try:
-            # Cari folder project di data-clone-github
-            for project_dir in os.listdir(self.github_path):
-                project_path = self.github_path / project_dir
-                
-                if os.path.isdir(project_path):
-                    # Baca README.md jika ada
-                    readme_path = project_path / "README.md"
-                    if readme_path.exists():
-                        try:
-                            with open(readme_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                            
-                            if self._is_relevant(content, question):
-                                results.append({
-                                    "content": content[:1000],  # Limit content
-                                    "source": f"GitHub: {project_dir}",
-                                    "type": "github_project",
-                                    "path": str(project_path)
-                                })
-                                
-                        except Exception as e:
-                            logger.warning(f"Error reading README for {project_dir}: {str(e)}")
+            for index in ranked_indices(ranked, (KIND_ARTICLE,))[:5]:  # Limit to top 5 results
+                document = corpus[index]
+                results.append({
+                    "content": document["content"][:1000],  # Limit content
+                    "source": document["source"],
+                    "type": "article",
+                    "path": document["path"],
+                    "duplicates": [duplicate["source"] for duplicate in document["duplicates"]]
+                })
                     
-                    # Cari file kode yang relevan
-                    code_files = self._find_relevant_code_files(project_path, question)
-                    for code_file in code_files:
-                        results.append(code_file)
-                        
         except Exception as e:
-            logger.error(f"Error searching GitHub projects: {str(e)}")
+            logger.error(f"Error searching articles: {str(e)}")
         
-        return results[:5]  # Limit to top 5 results
+        return results
     
-    def _find_relevant_code_files(self, project_path: Path, question: str) -> List[Dict[str, Any]]:
+    def _search_github_projects(self, corpus: List[Dict[str, Any]], ranked: Dict[Tuple[int, int], List[Tuple[int, int]]]) -> List[Dict[str, Any]]:
         """
-        Cari file kode yang relevan dalam project
+        Ambil GitHub projects (README dan maksimal 3 file kode per project)
+        yang paling relevan dengan pertanyaan
         """
         results = []
-        code_extensions = ['.py', '.js', '.ts', '.java', '.cpp', '.c', '.html', '.css']
         
         try:
-            for ext in code_extensions:
-                for file_path in project_path.rglob(f"*{ext}"):
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        
-                        if self._is_relevant(content, question) and len(content) < 5000:  # Skip very large files
-                            results.append({
-                                "content": content[:800],  # Limit content
-                                "source": f"Code: {file_path.name}",
-                                "type": "code_file",
-                                "path": str(file_path)
-                            })
-                            
-                    except Exception as e:
-                        logger.warning(f"Error reading code file {file_path}: {str(e)}")
-                        continue
+            for index in ranked_indices(ranked, (KIND_README, KIND_CODE))[:5]:  # Limit to top 5 results
+                document = corpus[index]
+                content_limit = 800 if document["type"] == "code_file" else 1000
+                results.append({
+                    "content": document["content"][:content_limit],  # Limit content
+                    "source": document["source"],
+                    "type": document["type"],
+                    "path": document["path"],
+                    "duplicates": [duplicate["source"] for duplicate in document["duplicates"]]
+                })
                         
         except Exception as e:
-            logger.error(f"Error finding code files: {str(e)}")
+            logger.error(f"Error searching GitHub projects: {str(e)}")
         
-        return results[:3]  # Limit code files
+        return results
     
-    def _is_relevant(self, content: str, question: str) -> bool:
+    def _relevance_score(self, document: Dict[str, Any], keywords: List[Tuple[str, ...]]) -> int:
         """
-        Simple relevance check (bisa diperbaiki dengan semantic similarity)
+        Hitung jumlah keyword pertanyaan yang ditemukan di dokumen; sebuah
+        keyword cocok jika salah satu variannya ada di teks atau term dokumen
         """
-        content_lower = content.lower()
-        question_lower = question.lower()
-        
-        # Extract keywords from question
-        keywords = [word.strip() for word in question_lower.split() if len(word.strip()) > 2]
-        
-        # Check if any keyword exists in content
-        relevance_score = 0
-        for keyword in keywords:
-            if keyword in content_lower:
-                relevance_score += 1
-        
-        # Return True if at least 1 keyword found or if content is short (likely important)
-        return relevance_score > 0 or len(content) < 200
+        score = 0
+        for variants in keywords:
+            for variant in variants:
+                if variant in document["terms"] or variant in document["content_lower"]:
+                    score += 1
+                    break
+        return score
     
     def count_articles(self) -> int:
         """
@@ -185,6 +366,13 @@ class RAGService:
             logger.error(f"Error counting articles: {str(e)}")
             return 0
     
+    def close(self):
+        """
+        Hentikan worker scoring paralel (dipanggil saat aplikasi shutdown)
+        """
+        if self.scoring_executor:
+            self.scoring_executor.shutdown()
+    
     def count_projects(self) -> int:
         """
         Hitung jumlah GitHub projects yang tersedia
@@ -0,0 +1,243 @@
+import os
+import mmap
+import heapq
+import struct
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Jenis dokumen dan batas top-k per grup (artikel, README project, file kode per project)
+KIND_ARTICLE = 0
+KIND_README = 1
+KIND_CODE = 2
+KIND_LIMITS = (5, 1, 3)
+
+MAGIC = b"RAGSEG01"
+HEADER = struct.Struct("<8sI")
+# content_offset, content_length, terms_offset, terms_length, char_length, kind, group
+ENTRY = struct.Struct("<QIQIIBI")
+
+GroupKey = Tuple[int, int]
+RankedItem = Tuple[int, int]  # (score, -index)
+
+Keywords = Sequence[Tuple[str, ...]]
+Segment = Tuple[str, int]  # (path file segment, jumlah dokumen)
+
+
+def push_top_k(heaps: Dict[GroupKey, List[RankedItem]], key: GroupKey, item: RankedItem, limit: int):
+    """
+    Simpan item ke min-heap grup dengan ukuran maksimal limit
+    """
+    heap = heaps.get(key)
+    if heap is None:
+        heaps[key] = [item]
+    elif len(heap) < limit:
+        heapq.heappush(heap, item)
+    elif item > heap[0]:
+        heapq.heapreplace(heap, item)
+
+
+def merge_top_k(partials: List[Dict[GroupKey, List[RankedItem]]]) -> Dict[GroupKey, List[RankedItem]]:
+    """
+    Gabungkan heap top-k per grup dari beberapa segment
+    """
+    merged: Dict[GroupKey, List[RankedItem]] = {}
+    for partial in partials:
+        for key, items in partial.items():
+            for item in items:
+                push_top_k(merged, key, item, KIND_LIMITS[key[0]])
+    return merged
+
+
+def ranked_indices(ranked: Dict[GroupKey, List[RankedItem]], kinds: Sequence[int]) -> List[int]:
+    """
+    Index dokumen dari grup dengan jenis tertentu, skor tertinggi lebih dulu
+    (skor sama diurutkan sesuai urutan corpus)
+    """
+    items = [item for key, heap in ranked.items() if key[0] in kinds for item in heap]
+    items.sort(reverse=True)
+    return [-negative_index for _, negative_index in items]
+
+
+def write_segment_file(path: Path, corpus: List[Dict[str, Any]]):
+    """
+    Serialisasi corpus (teks lowercase dan term) ke satu file yang bisa
+    di-mmap oleh worker; offset table diletakkan setelah header
+    """
+    table_size = HEADER.size + ENTRY.size * len(corpus)
+    entries = []
+    blobs = []
+    offset = table_size
+
+    for document in corpus:
+        content = document["content_lower"].encode("utf-8")
+        terms = (" " + " ".join(document["terms"]) + " ").encode("utf-8")
+        entries.append(ENTRY.pack(
+            offset, len(content), offset + len(content), len(terms),
+            len(document["content"]), document["kind"], document["group"]
+        ))
+        blobs.append(content)
+        blobs.append(terms)
+        offset += len(content) + len(terms)
+
+    temp_path = path.with_suffix(".tmp")
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(corpus)))
+        f.writelines(entries)
+        f.writelines(blobs)
+    os.replace(temp_path, path)
+
+
+# Cache mmap di proses worker: path -> (mmap, jumlah dokumen)
+_worker_segments: Dict[str, Tuple[mmap.mmap, int]] = {}
+
+
+def _open_segment_file(path: str) -> Tuple[mmap.mmap, int]:
+    cached = _worker_segments.get(path)
+    if cached is not None:
+        return cached
+
+    # File lama (versi corpus sebelumnya) tidak dipakai lagi
+    for old_path, (old_map, _) in list(_worker_segments.items()):
+        old_map.close()
+        del _worker_segments[old_path]
+
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, count = HEADER.unpack_from(mapped, 0)
+    if magic != MAGIC:
+        raise ValueError(f"Segment file tidak valid: {path}")
+
+    _worker_segments[path] = (mapped, count)
+    return mapped, count
+
+
+def score_segment(path: str, start: int, end: int, keywords: Keywords) -> Dict[GroupKey, List[RankedItem]]:
+    """
+    Skor dokumen [start, end) langsung di atas mmap (tanpa menyalin teks)
+    dan kembalikan heap top-k per grup
+    """
+    mapped, count = _open_segment_file(path)
+    encoded = [
+        [(f" {variant} ".encode("utf-8"), variant.encode("utf-8")) for variant in variants]
+        for variants in keywords
+    ]
+
+    heaps: Dict[GroupKey, List[RankedItem]] = {}
+    for index in range(start, min(end, count)):
+        (content_offset, content_length, terms_offset, terms_length,
+         char_length, kind, group) = ENTRY.unpack_from(mapped, HEADER.size + index * ENTRY.size)
+        content_end = content_offset + content_length
+        terms_end = terms_offset + terms_length
+
+        score = 0
+        for variants in encoded:
+            for padded, raw in variants:
+                if (mapped.find(padded, terms_offset, terms_end) != -1
+                        or mapped.find(raw, content_offset, content_end) != -1):
+                    score += 1
+                    break
+
+        # Sama dengan RAGService._rank_documents: ada keyword cocok atau konten pendek
+        if score == 0 and char_length >= 200:
+            continue
+        push_top_k(heaps, (kind, group), (score, -index), KIND_LIMITS[kind])
+
+    return heaps
+
+
+class ScoringExecutor:
+    """
+    Skor corpus besar secara paralel di beberapa worker process
+
+    Corpus ditulis sekali ke file segment yang di-mmap oleh setiap worker
+    (halaman file dibagi lewat page cache OS), lalu dipartisi menjadi
+    beberapa range index. Setiap worker mengembalikan heap top-k per grup
+    dan hasilnya digabung di proses utama.
+    """
+
+    def __init__(self, workers: int, index_path: Path):
+        self.workers = workers
+        self.index_path = index_path
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._segment_path: Optional[Path] = None
+        self._count = 0
+        self._version = 0
+
+    def load(self, corpus: List[Dict[str, Any]]) -> Segment:
+        """
+        Tulis ulang file segment untuk corpus baru; kembalikan segment yang
+        dipakai rank() untuk corpus tersebut
+        """
+        os.makedirs(self.index_path, exist_ok=True)
+        self._version += 1
+        segment_path = self.index_path / f"segments_{os.getpid()}_{self._version}.bin"
+        write_segment_file(segment_path, corpus)
+
+        old_path = self._segment_path
+        self._segment_path = segment_path
+        self._count = len(corpus)
+        segment = (str(segment_path), len(corpus))
+
+        if old_path is not None:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+        return segment
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: worker tidak mewarisi event loop/thread dari server
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def rank(self, keywords: Keywords, segment: Optional[Segment] = None) -> Dict[GroupKey, List[RankedItem]]:
+        """
+        Skor seluruh corpus secara paralel dan gabungkan top-k per grup
+
+        Memblokir thread pemanggil sampai semua worker selesai; dari kode
+        async panggil lewat thread pool (lihat /chat di app.py).
+        segment (hasil load()) memastikan index hasil cocok dengan corpus
+        pemanggil walaupun corpus sudah dimuat ulang oleh thread lain.
+        """
+        if segment is None:
+            if self._segment_path is None:
+                return {}
+            segment = (str(self._segment_path), self._count)
+
+        segment_path, count = segment
+        segment_size = -(-count // self.workers)
+        keywords = [tuple(variants) for variants in keywords]
+        pool = self._get_pool()
+        futures = [
+            pool.submit(score_segment, segment_path, start, start + segment_size, keywords)
+            for start in range(0, count, segment_size)
+        ]
+        return merge_top_k([future.result() for future in futures])
+
+    def shutdown(self):
+        """
+        Hentikan worker dan hapus file segment
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+        if self._segment_path is not None:
+            try:
+                os.remove(self._segment_path)
+            except OSError:
+                pass
+            self._segment_path = None
@@ -0,0 +1,272 @@
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Kata (huruf/angka/underscore), identifier kode ikut tertangkap utuh
+WORD_PATTERN = re.compile(r"[0-9A-Za-z_À-ɏ]+")
+CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+
+def tokenize(text: str, min_length: int = 3) -> List[str]:
+    """
+    Pecah teks menjadi term lowercase, termasuk pecahan identifier
+    (snake_case / camelCase) dan bentuk gabungannya
+    """
+    terms = []
+    seen = set()
+
+    def _add(term: str):
+        if len(term) >= min_length and term not in seen:
+            seen.add(term)
+            terms.append(term)
+
+    for word in WORD_PATTERN.findall(text):
+        parts = [p for chunk in word.split("_") for p in CAMEL_BOUNDARY.split(chunk) if p]
+        _add(word.lower())
+        if len(parts) > 1:
+            _add("".join(parts).lower())
+            for part in parts:
+                _add(part.lower())
+
+    return terms
+
+
+class IndonesianStemmer:
+    """
+    Penghapus imbuhan bahasa Indonesia yang ringan (bukan stemmer lengkap)
+
+    Urutan: partikel (-lah, -kah, ...), kata ganti milik (-nya, -ku, -mu),
+    akhiran (-kan, -an, -i), lalu awalan (me-, pe-, ber-, di-, ...).
+    Huruf awal yang luluh (menulis -> ulis) tidak dikembalikan; karena
+    stemmer dipakai di sisi ingest dan query, hasilnya tetap konsisten.
+    """
+
+    PARTICLES = ("lah", "kah", "tah", "pun")
+    POSSESSIVES = ("nya", "ku", "mu")
+    SUFFIXES = ("kan", "an", "i")
+    PREFIXES = (
+        "meng", "meny", "mem", "men", "me",
+        "peng", "peny", "pem", "pen", "per", "pe",
+        "ber", "ter", "di", "ke", "se",
+    )
+
+    def __init__(self, min_stem_length: int = 4):
+        self.min_stem_length = min_stem_length
+        self._cache: Dict[str, str] = {}
+
+    def stem(self, word: str) -> str:
+        """
+        Ambil bentuk dasar dari sebuah kata (lowercase)
+        """
+        cached = self._cache.get(word)
+        if cached is not None:
+            return cached
+
+        stem = word
+        if word.isalpha():
+            stem = self._strip_suffix(stem, self.PARTICLES)
+            stem = self._strip_suffix(stem, self.POSSESSIVES)
+            stem = self._strip_suffix(stem, self.SUFFIXES)
+            stem = self._strip_prefix(stem)
+
+        if len(self._cache) < 100000:
+            self._cache[word] = stem
+        return stem
+
+    def _strip_suffix(self, word: str, suffixes: Tuple[str, ...]) -> str:
+        for suffix in suffixes:
+            if word.endswith(suffix) and len(word) - len(suffix) >= self.min_stem_length:
+                return word[:-len(suffix)]
+        return word
+
+    def _strip_prefix(self, word: str) -> str:
+        for prefix in self.PREFIXES:
+            if word.startswith(prefix) and len(word) - len(prefix) >= self.min_stem_length:
+                return word[len(prefix):]
+        return word
+
+
+def _trigrams(term: str) -> frozenset:
+    padded = f"  {term} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def bounded_edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Edit distance (Damerau, transposisi dihitung satu edit) dengan batas;
+    mengembalikan max_distance + 1 segera setelah jarak melebihi batas
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    # Hanya sel dalam pita |i - j| <= max_distance yang dihitung
+    limit = max_distance + 1
+    before_previous = None
+    previous = [j if j <= max_distance else limit for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        char_a = a[i - 1]
+        current = [i if i <= max_distance else limit] + [limit] * len(b)
+        row_min = current[0]
+        for j in range(max(1, i - max_distance), min(len(b), i + max_distance) + 1):
+            char_b = b[j - 1]
+            value = previous[j - 1] if char_a == char_b else previous[j - 1] + 1
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if (before_previous is not None and j > 1
+                    and char_a == b[j - 2] and a[i - 2] == char_b
+                    and before_previous[j - 2] + 1 < value):
+                value = before_previous[j - 2] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return limit
+        before_previous, previous = previous, current
+
+    return min(previous[-1], limit)
+
+
+class TrigramIndex:
+    """
+    Indeks trigram atas vocabulary untuk ekspansi term yang toleran typo
+
+    Posting list dikelompokkan per panjang term, sehingga ekspansi hanya
+    menyentuh term dengan panjang yang mungkin berada dalam batas edit
+    distance (tidak pernah memindai seluruh vocabulary).
+    """
+
+    def __init__(self, min_similarity: float = 0.3, max_expansions: int = 3):
+        self.min_similarity = min_similarity
+        self.max_expansions = max_expansions
+        self._terms: List[str] = []
+        self._term_ids: Dict[str, int] = {}
+        self._gram_counts: List[int] = []
+        # trigram -> panjang term -> list term id
+        self._postings: Dict[str, Dict[int, List[int]]] = {}
+        self._cache: Dict[str, List[Tuple[str, float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._term_ids
+
+    def add(self, term: str):
+        """
+        Tambahkan satu term ke vocabulary
+        """
+        if term in self._term_ids:
+            return
+
+        term_id = len(self._terms)
+        grams = _trigrams(term)
+        self._terms.append(term)
+        self._term_ids[term] = term_id
+        self._gram_counts.append(len(grams))
+
+        length = len(term)
+        for gram in grams:
+            self._postings.setdefault(gram, {}).setdefault(length, []).append(term_id)
+
+        if self._cache:
+            self._cache = {}
+
+    def build(self, terms: Iterable[str]):
+        """
+        Bangun ulang indeks dari kumpulan term
+        """
+        self._terms = []
+        self._term_ids = {}
+        self._gram_counts = []
+        self._postings = {}
+        self._cache = {}
+        for term in terms:
+            self.add(term)
+
+    def expand(self, term: str, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Cari term vocabulary dalam batas edit distance, diurutkan berdasarkan
+        skor (gabungan kemiripan trigram dan edit distance); kandidat dengan
+        kemiripan trigram di bawah min_similarity diletakkan di akhir
+        """
+        limit = limit or self.max_expansions
+
+        if term in self._term_ids:
+            return [(term, 1.0)]
+
+        cached = self._cache.get(term)
+        if cached is not None:
+            return cached[:limit]
+
+        max_edits = 1 if len(term) <= 12 else 2
+        query_grams = _trigrams(term)
+        # Satu edit (termasuk transposisi) merusak paling banyak 4 trigram
+        min_shared = max(1, len(query_grams) - 4 * max_edits)
+        lengths = range(max(1, len(term) - max_edits), len(term) + max_edits + 1)
+
+        postings = []
+        for gram in query_grams:
+            by_length = self._postings.get(gram, {})
+            lists = [by_length[length] for length in lengths if length in by_length]
+            postings.append((sum(len(ids) for ids in lists), gram, lists))
+        postings.sort(key=lambda item: item[0])
+
+        # Kandidat valid pasti muncul di salah satu trigram paling jarang ini
+        seed_size = len(query_grams) - min_shared + 1
+        counts: Counter = Counter()
+        for _, _, lists in postings[:seed_size]:
+            for term_ids in lists:
+                counts.update(term_ids)
+
+        # Trigram sisanya dipakai untuk memangkas kandidat; posting list yang
+        # panjang tidak dipindai, cukup cek trigram langsung pada kandidat
+        terms = self._terms
+        candidates = list(counts)
+        remaining = len(postings) - seed_size
+        for size, gram, lists in postings[seed_size:]:
+            if not candidates:
+                break
+            remaining -= 1
+            required = min_shared - remaining
+            if size > 2 * len(candidates):
+                for term_id in candidates:
+                    if gram in f"  {terms[term_id]} ":
+                        counts[term_id] += 1
+            else:
+                hits = set()
+                for term_ids in lists:
+                    hits.update(term_ids)
+                for term_id in hits.intersection(candidates):
+                    counts[term_id] += 1
+            candidates = [term_id for term_id in candidates if counts[term_id] >= required]
+
+        # Kandidat diterima berdasarkan edit distance; kemiripan trigram hanya
+        # dipakai untuk urutan (transposisi di term pendek seperti "pyhton"
+        # merusak sebagian besar trigram walaupun hanya satu edit)
+        query_size = len(query_grams)
+        scored = []
+        for term_id in candidates:
+            shared = counts[term_id]
+            if shared < min_shared:
+                continue
+            candidate = terms[term_id]
+            distance = bounded_edit_distance(term, candidate, max_edits)
+            if distance > max_edits:
+                continue
+            similarity = shared / (query_size + self._gram_counts[term_id] - shared)
+            score = similarity * (1 - distance / (max_edits + 1))
+            # Kandidat di bawah min_similarity diurutkan setelah kandidat lain
+            scored.append((similarity >= self.min_similarity, round(score, 4), candidate))
+
+        scored.sort(key=lambda item: (not item[0], -item[1], item[2]))
+        results = [(candidate, score) for _, score, candidate in scored]
+
+        # Cache menyimpan daftar lengkap supaya limit yang berbeda tetap benar
+        if len(self._cache) < 10000:
+            self._cache[term] = results
+        return results[:limit]
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modul backend (app, services) diimport seperti saat server dijalankan dari folder backend
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
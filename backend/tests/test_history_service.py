@@ -0,0 +1,138 @@
+import json
+from datetime import date
+
+import pytest
+
+from services.history_service import HistoryService
+
+DAY = "2026-01-05"
+LATER = date(2026, 2, 1)
+
+
+@pytest.fixture
+def history(monkeypatch, tmp_path):
+    monkeypatch.setenv("HISTORY_HOT_DAYS", "7")
+    monkeypatch.setenv("HISTORY_RETENTION_DAYS", "0")
+    monkeypatch.setenv("HISTORY_ARCHIVE_BLOCK_SIZE", "50")
+    return HistoryService(base_path=tmp_path)
+
+
+def _timestamp(date_str, i):
+    return f"{date_str}T10:{i // 60:02d}:{i % 60:02d}"
+
+
+def _save(history, date_str, count, start=0):
+    for i in range(start, start + count):
+        assert history.save_chat(f"q{i}", f"a{i}", _timestamp(date_str, i), ["doc.md"])
+
+
+def _questions(conversations):
+    return [conversation["question"] for conversation in conversations]
+
+
+def _data_files(history):
+    return sorted(path.name for path in (history.base_path / "archive").glob("*.jsonl.gz"))
+
+
+def test_compaction_is_idempotent(history):
+    _save(history, DAY, 120)
+    hot_data = json.loads((history.base_path / f"chat_{DAY}.json").read_text(encoding="utf-8"))
+
+    result = history.compact(today=LATER)
+    assert result["compacted_days"] == 1
+    assert result["archived_conversations"] == 120
+    assert not (history.base_path / f"chat_{DAY}.json").exists()
+    assert history.archive.count(DAY) == 120
+
+    assert history.compact(today=LATER)["compacted_days"] == 0
+
+    # Compaction yang terputus setelah append_day (marker tidak sempat dihapus)
+    # tidak boleh menggandakan percakapan
+    history._archiving_path(DAY).write_text(json.dumps(hot_data), encoding="utf-8")
+    history.compact(today=LATER)
+    assert not history._archiving_path(DAY).exists()
+    assert history.archive.count(DAY) == 120
+    assert _questions(history.get_history_by_date(DAY)) == [f"q{i}" for i in range(120)]
+
+
+def test_late_save_after_archive(history):
+    _save(history, DAY, 120)
+    history.compact(today=LATER)
+    files_before = _data_files(history)
+
+    # Percakapan terlambat ditulis ke file harian baru lalu digabung saat compaction
+    _save(history, DAY, 1, start=200)
+    assert len(history.get_history_by_date(DAY)) == 121
+    assert history.count_total_conversations() == 121
+
+    history.compact(today=LATER)
+    assert history.archive.count(DAY) == 121
+    assert _questions(history.get_history_by_date(DAY))[-1] == "q200"
+    assert _data_files(history) == files_before
+
+    # Blok lama tanggal tersebut menjadi sampah; setelah lebih dari separuh
+    # file tidak direferensikan, bulan ditulis ulang ke generasi baru
+    _save(history, DAY, 1, start=201)
+    history.compact(today=LATER)
+    assert _data_files(history) == ["archive_2026-01.1.jsonl.gz"]
+    assert history.archive.count(DAY) == 122
+    assert _questions(history.get_history_by_date(DAY)) == [f"q{i}" for i in range(120)] + ["q200", "q201"]
+
+
+def test_delete_rewrites_month(history):
+    _save(history, DAY, 60)
+    _save(history, "2026-01-06", 30)
+    history.compact(today=LATER)
+    assert _data_files(history) == ["archive_2026-01.jsonl.gz"]
+
+    assert history.delete_history_by_date(DAY)
+    assert _data_files(history) == ["archive_2026-01.1.jsonl.gz"]
+    assert history.list_dates() == ["2026-01-06"]
+    assert history.get_history_by_date(DAY) == []
+    assert _questions(history.get_history_by_date("2026-01-06")) == [f"q{i}" for i in range(30)]
+
+    assert history.delete_history_by_date("2026-01-06")
+    assert _data_files(history) == []
+    assert history.archive.months() == []
+    assert not history.delete_history_by_date("2026-01-06")
+
+
+def test_retention_expires_archive_and_hot_files(history):
+    history.retention_days = 30
+    _save(history, "2025-11-20", 10)
+    _save(history, DAY, 10)
+    history.compact(today=date(2026, 1, 20))
+    assert history.list_dates() == [DAY]
+    assert history.archive.months() == ["2026-01"]
+
+    # Hari yang sudah diarsip juga dihapus setelah lewat retensi
+    _save(history, "2026-02-10", 5)
+    result = history.compact(today=date(2026, 3, 1))
+    assert result["expired_days"] == 1
+    assert history.list_dates() == ["2026-02-10"]
+    assert _data_files(history) == ["archive_2026-02.jsonl.gz"]
+
+
+@pytest.mark.parametrize("offset, limit", [
+    (0, 10), (45, 10), (49, 2), (50, 50), (95, 30), (100, None), (119, 5), (120, 5), (0, None)
+])
+def test_paging_across_blocks(history, offset, limit):
+    _save(history, DAY, 120)
+    history.compact(today=LATER)
+    blocks = history.archive._load_index("2026-01")["days"][DAY]["blocks"]
+    assert [block["count"] for block in blocks] == [50, 50, 20]
+
+    expected = [f"q{i}" for i in range(120)]
+    expected = expected[offset:] if limit is None else expected[offset:offset + limit]
+    assert _questions(history.archive.read_day(DAY, offset, limit)) == expected
+    assert _questions(history.get_history_by_date(DAY, offset=offset, limit=limit)) == expected
+
+
+def test_paging_rejects_invalid_range(history):
+    _save(history, DAY, 10)
+    history.compact(today=LATER)
+
+    with pytest.raises(ValueError):
+        history.archive.read_day(DAY, -1, 10)
+    with pytest.raises(ValueError):
+        history.archive.read_day(DAY, 0, 0)
@@ -0,0 +1,173 @@
+import asyncio
+
+import pytest
+
+from services.llm_providers import (
+    CircuitBreaker,
+    LLMUnavailableError,
+    ProviderError,
+    ProviderRouter,
+    StubProvider,
+)
+
+
+class SlowFirstProvider(StubProvider):
+    """Stub yang lambat hanya pada panggilan pertama"""
+
+    async def generate(self, prompt: str) -> str:
+        if self.calls == 0:
+            self.calls += 1
+            await asyncio.sleep(5)
+        return await super().generate(prompt)
+
+
+class StatusErrorProvider(StubProvider):
+    """Stub yang selalu gagal dengan status HTTP tertentu"""
+
+    def __init__(self, name: str, status: int):
+        super().__init__(name)
+        self.status = status
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        raise ProviderError(f"Error {self.status}", status=self.status)
+
+
+def _breaker(**kwargs):
+    return lambda: CircuitBreaker(min_requests=2, error_rate=0.5, **kwargs)
+
+
+def test_hedge_to_next_provider_wins():
+    slow = StubProvider("slow", answer="slow", latency=5)
+    fast = StubProvider("fast", answer="fast")
+    router = ProviderRouter([slow, fast], hedge_min_delay=0.05, request_timeout=0.1)
+
+    assert asyncio.run(router.generate("halo")) == "fast"
+    stats = router.get_stats()
+    assert stats["hedged_requests"] == 1
+    assert stats["fallbacks"] == 0
+    assert stats["providers"][0]["cancelled"] == 1
+
+
+def test_hedge_reissues_to_single_provider():
+    provider = SlowFirstProvider("only", answer="ok")
+    router = ProviderRouter([provider], hedge_min_delay=0.05, request_timeout=0.1)
+
+    assert asyncio.run(router.generate("halo")) == "ok"
+    assert provider.calls == 2
+    assert router.get_stats()["hedged_requests"] == 1
+
+
+def test_hedge_does_not_duplicate_with_two_providers():
+    first = StubProvider("a", answer="a", latency=0.3)
+    second = StubProvider("b", answer="b", latency=0.3)
+    router = ProviderRouter([first, second], hedge_min_delay=0.05, request_timeout=1.0)
+    # Latency terkini kecil: hedge dan (jika diizinkan) duplikasi terjadi jauh sebelum jawaban
+    for name in ("a", "b"):
+        router.breakers[name].record(True, 0.01)
+
+    assert asyncio.run(router.generate("halo")) == "a"
+    assert first.calls == 1
+    assert second.calls == 1
+    assert router.get_stats()["hedged_requests"] == 1
+
+
+def test_fallback_after_failure():
+    broken = StubProvider("broken", error_rate=1.0)
+    backup = StubProvider("backup", answer="backup")
+    router = ProviderRouter([broken, backup], hedge_min_delay=1.0)
+
+    assert asyncio.run(router.generate("halo")) == "backup"
+    stats = router.get_stats()
+    assert stats["fallbacks"] == 1
+    assert stats["hedged_requests"] == 0
+    assert stats["providers"][0]["failures"] == 1
+
+
+def test_breaker_open_half_open_closed():
+    provider = StubProvider("flaky", answer="ok", error_rate=1.0)
+    router = ProviderRouter([provider], hedge_min_delay=1.0, breaker_factory=_breaker(cooldown=0.05))
+    breaker = router.breakers["flaky"]
+
+    for _ in range(2):
+        with pytest.raises(LLMUnavailableError):
+            asyncio.run(router.generate("halo"))
+    assert breaker.state == "open"
+
+    # Selama cooldown provider dilewati tanpa dipanggil
+    with pytest.raises(LLMUnavailableError) as excinfo:
+        asyncio.run(router.generate("halo"))
+    assert excinfo.value.retry_after >= 1
+    assert provider.calls == 2
+
+    provider.error_rate = 0.0
+    provider.latency = 0.05
+
+    async def trial():
+        task = asyncio.create_task(router.generate("halo"))
+        await asyncio.sleep(0.01)
+        state_during_trial = breaker.state
+        return state_during_trial, await task
+
+    asyncio.run(asyncio.sleep(0.06))
+    state_during_trial, answer = asyncio.run(trial())
+    assert state_during_trial == "half_open"
+    assert answer == "ok"
+    assert breaker.state == "closed"
+
+
+def test_client_error_does_not_open_breaker():
+    provider = StatusErrorProvider("gemini", 400)
+    router = ProviderRouter([provider], hedge_min_delay=1.0, breaker_factory=_breaker())
+
+    for _ in range(5):
+        with pytest.raises(LLMUnavailableError):
+            asyncio.run(router.generate("halo"))
+
+    assert provider.calls == 5
+    assert router.breakers["gemini"].state == "closed"
+    assert router.get_stats()["providers"][0]["failures"] == 5
+
+
+def test_rate_limit_opens_breaker():
+    provider = StatusErrorProvider("gemini", 429)
+    router = ProviderRouter([provider], hedge_min_delay=1.0, breaker_factory=_breaker())
+
+    for _ in range(3):
+        with pytest.raises(LLMUnavailableError):
+            asyncio.run(router.generate("halo"))
+
+    assert provider.calls == 2
+    assert router.breakers["gemini"].state == "open"
+
+
+def test_chat_returns_503_with_retry_after(monkeypatch):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    import app as app_module
+
+    router = ProviderRouter(
+        [StubProvider("stub", error_rate=1.0)],
+        hedge_min_delay=1.0,
+        breaker_factory=_breaker(cooldown=30)
+    )
+    monkeypatch.setattr(app_module.gemini_service, "router", router)
+    monkeypatch.setattr(app_module.rag_service, "retrieve_context",
+                        lambda question: {"articles": [], "github_projects": [], "sources": []})
+    saved = []
+    monkeypatch.setattr(app_module.history_service, "save_chat", lambda **kwargs: saved.append(kwargs))
+
+    # Tanpa context manager: event startup (compaction history) tidak dijalankan
+    client = TestClient(app_module.app)
+    response = client.post("/chat", json={"question": "halo"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    # Kegagalan kedua membuka breaker: Retry-After mengikuti sisa cooldown
+    for _ in range(2):
+        response = client.post("/chat", json={"question": "halo"})
+        assert response.status_code == 503
+        assert 1 < int(response.headers["Retry-After"]) <= 30
+    assert router.providers[0].calls == 2
+    assert saved == []
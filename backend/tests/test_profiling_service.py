@@ -0,0 +1,54 @@
+import pytest
+
+from services.llm_providers import CircuitBreaker, ProviderRouter, StubProvider
+from services.profiling_service import NULL_PROFILE, RequestProfiler
+
+
+def _profiler(monkeypatch, tmp_path, token):
+    monkeypatch.setenv("PROFILE_ENABLED", "true")
+    monkeypatch.setenv("PROFILE_TOKEN", token)
+    return RequestProfiler(base_path=tmp_path / "data-profiles")
+
+
+def test_profiling_requires_token(monkeypatch, tmp_path):
+    profiler = _profiler(monkeypatch, tmp_path, "")
+
+    assert profiler.enabled is False
+    assert profiler.is_authorized("") is False
+    assert profiler.is_authorized("apa saja") is False
+    assert profiler.start({"x-profile": "1"}) is NULL_PROFILE
+
+
+def test_profiling_checks_token(monkeypatch, tmp_path):
+    profiler = _profiler(monkeypatch, tmp_path, "rahasia")
+
+    assert profiler.enabled is True
+    assert profiler.is_authorized("rahasia") is True
+    assert profiler.is_authorized("salah") is False
+    assert profiler.is_authorized(None) is False
+    assert profiler.start({"x-profile": "salah"}) is NULL_PROFILE
+    assert profiler.start({"x-profile": "rahasia"}) is not NULL_PROFILE
+
+
+def test_profile_id_header_on_error_response(monkeypatch, tmp_path):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    import app as app_module
+
+    monkeypatch.setattr(app_module, "request_profiler", _profiler(monkeypatch, tmp_path, "rahasia"))
+    monkeypatch.setattr(app_module.gemini_service, "router", ProviderRouter(
+        [StubProvider("stub", error_rate=1.0)],
+        hedge_min_delay=1.0,
+        breaker_factory=lambda: CircuitBreaker(min_requests=5)
+    ))
+    monkeypatch.setattr(app_module.rag_service, "retrieve_context",
+                        lambda question: {"articles": [], "github_projects": [], "sources": []})
+
+    client = TestClient(app_module.app)
+    response = client.post("/chat", json={"question": "halo"}, headers={"X-Profile": "rahasia"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    profile_id = response.headers["X-Profile-Id"]
+    assert (tmp_path / "data-profiles" / f"profile_{profile_id}.prof").exists()
@@ -0,0 +1,49 @@
+import pytest
+
+from benchmarks.scoring_scaling import QUERIES
+from benchmarks.synthetic import generate_corpus, generate_questions
+from services.rag_service import RAGService
+from services.scoring_executor import ScoringExecutor
+
+
+def _top_k(ranked):
+    # Urutan item di dalam heap bergantung urutan push; yang dibandingkan isi top-k per grup
+    return {key: sorted(items, reverse=True) for key, items in ranked.items()}
+
+
+@pytest.fixture(scope="module")
+def knowledge_base(tmp_path_factory):
+    base_path = tmp_path_factory.mktemp("rag-data")
+    topics = generate_corpus(base_path, 300)
+
+    # Kasus tepi: teks non-ASCII, keyword di awal/akhir teks, substring
+    # di dalam kata lain, dan dokumen pendek tanpa keyword yang cocok
+    articles = base_path / "data-artikel"
+    (articles / "unicode.md").write_text("Café résumé naïve — retrieval ünïcode " * 20, encoding="utf-8")
+    (articles / "edges.md").write_text("fastapi " + "isi " * 100 + "database", encoding="utf-8")
+    (articles / "short.txt").write_text("catatan singkat", encoding="utf-8")
+    return base_path, topics
+
+
+def test_parallel_rank_matches_serial(monkeypatch, knowledge_base):
+    base_path, topics = knowledge_base
+    monkeypatch.setenv("RAG_SCORING_WORKERS", "1")
+    rag_service = RAGService(base_path=base_path)
+    corpus = rag_service._ensure_corpus()
+
+    questions = QUERIES + [item["question"] for item in generate_questions(topics, 12)] + [
+        "café résumé ünïcode",
+        "api",
+        "fastapi database",
+        "kata yang tidak ada sama sekali",
+    ]
+
+    executor = ScoringExecutor(2, base_path / "data-index")
+    try:
+        segment = executor.load(corpus)
+        for question in questions:
+            keywords = rag_service._extract_keywords(question)
+            expected = _top_k(rag_service._rank_documents(corpus, keywords))
+            assert _top_k(executor.rank(keywords, segment)) == expected, question
+    finally:
+        executor.shutdown()
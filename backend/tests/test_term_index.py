@@ -0,0 +1,30 @@
+from services.term_index import TrigramIndex
+
+
+def _index(*terms):
+    index = TrigramIndex()
+    index.build(terms)
+    return index
+
+
+def test_expand_transpositions_in_short_terms():
+    index = _index("python", "query", "model", "fastapi")
+
+    assert [term for term, _ in index.expand("pyhton")] == ["python"]
+    assert [term for term, _ in index.expand("qeury")] == ["query"]
+    assert [term for term, _ in index.expand("mdoel")] == ["model"]
+    assert [term for term, _ in index.expand("fastpi")] == ["fastapi"]
+
+
+def test_expand_rejects_terms_beyond_edit_distance():
+    index = _index("python", "pylon")
+
+    assert index.expand("pyhtno") == []
+
+
+def test_expand_cache_respects_limit():
+    index = _index("model", "motel", "mole", "modal")
+
+    # Panggilan pertama dengan limit kecil tidak memotong daftar yang di-cache
+    assert len(index.expand("moel", limit=1)) == 1
+    assert [term for term, _ in index.expand("moel", limit=5)] == ["model", "motel", "mole"]